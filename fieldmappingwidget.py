@@ -6,14 +6,14 @@ Description: Widget for mapping data to PDF form fields
 """
 
 import sys
-from typing import Dict, List
+from typing import Dict, List, Optional
 from dataclasses import dataclass
 from typing import List as TypeList
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QGridLayout, QGroupBox,
     QLabel, QLineEdit, QComboBox, QCheckBox, QScrollArea
 )
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, pyqtSignal
 
 # Define FormField class directly to avoid circular imports
 @dataclass
@@ -35,11 +35,14 @@ class FormField:
 
 class FieldMappingWidget(QWidget):
     """Widget for mapping data to form fields"""
+    data_changed = pyqtSignal()  # any field value was edited or set
     
     def __init__(self):
         super().__init__()
         self.fields = []
         self.field_widgets = {}
+        self._nonempty_cache: Optional[Dict[str, str]] = None
+        self.data_changed.connect(self._invalidate_data_cache)
         self.init_ui()
 
     def init_ui(self):
@@ -56,6 +59,10 @@ class FieldMappingWidget(QWidget):
         # Scroll area for fields
         self.scroll_area = QScrollArea()
         self.scroll_widget = QWidget()
+        # One scoped rule instead of a stylesheet per field-name label
+        self.scroll_widget.setStyleSheet(
+            'QLabel[cssClass="fieldName"] { font-family: monospace; font-size: 8pt; }'
+        )
         self.scroll_layout = QVBoxLayout(self.scroll_widget)
         self.scroll_area.setWidget(self.scroll_widget)
         self.scroll_area.setWidgetResizable(True)
@@ -67,6 +74,7 @@ class FieldMappingWidget(QWidget):
         """Set the form fields and create input widgets"""
         self.fields = fields
         self.field_widgets = {}
+        self._nonempty_cache = None
         
         # Clear existing widgets
         for i in reversed(range(self.scroll_layout.count())):
@@ -74,14 +82,14 @@ class FieldMappingWidget(QWidget):
 
         # Create widgets for each field
         for field in fields:
-            group = QGroupBox(field.alttext or field.name)
+            group = QGroupBox(field.alt_text or field.name)
             group_layout = QGridLayout()
             
             # Field name (read-only)
             group_layout.addWidget(QLabel("Field Name:"), 0, 0)
             name_label = QLabel(field.name)
             name_label.setWordWrap(True)
-            name_label.setStyleSheet("font-family: monospace; font-size: 8pt;")
+            name_label.setProperty("cssClass", "fieldName")
             group_layout.addWidget(name_label, 0, 1)
             
             # Field type
@@ -96,13 +104,16 @@ class FieldMappingWidget(QWidget):
                 widget = QComboBox()
                 widget.addItem("")  # Empty option
                 widget.addItems(field.state_options)
+                widget.currentTextChanged.connect(self.data_changed)
             elif field.type == "Button":
                 # Checkbox for simple buttons
                 widget = QCheckBox("Check this field")
+                widget.toggled.connect(self.data_changed)
             else:
                 # Text input for other fields
                 widget = QLineEdit()
                 widget.setPlaceholderText("Enter value here...")
+                widget.textChanged.connect(self.data_changed)
             
             group_layout.addWidget(widget, 2, 1)
             self.field_widgets[field.name] = widget
@@ -130,6 +141,34 @@ class FieldMappingWidget(QWidget):
                 data[field_name] = "1" if widget.isChecked() else ""
         return data
 
+    def get_nonempty_field_data(self):
+        """Yield (field_name, value) only for fields that have a non-blank value"""
+        for field_name, widget in self.field_widgets.items():
+            if isinstance(widget, QLineEdit):
+                value = widget.text()
+            elif isinstance(widget, QComboBox):
+                value = widget.currentText()
+            elif isinstance(widget, QCheckBox):
+                value = "1" if widget.isChecked() else ""
+            else:
+                continue
+            # isspace() avoids the copy strip() would allocate
+            if value and not value.isspace():
+                yield field_name, value
+
+    def nonempty_field_data(self) -> Dict[str, str]:
+        """Non-blank field values, rebuilt only after an edit; treat as read-only"""
+        if self._nonempty_cache is None:
+            self._nonempty_cache = dict(self.get_nonempty_field_data())
+        return self._nonempty_cache
+
+    def count_nonempty(self) -> int:
+        """Number of fields with a non-blank value"""
+        return len(self.nonempty_field_data())
+
+    def _invalidate_data_cache(self):
+        self._nonempty_cache = None
+
     def set_field_data(self, data: Dict[str, str]):
         """Set field data from a dictionary"""
         for field_name, value in data.items():
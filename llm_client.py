@@ -9,28 +9,99 @@ import logging
 import json
 import re
 import base64
+import hashlib
+import importlib.util
+import threading
 from typing import Optional, Dict, List, Tuple
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
-# Check if OpenAI is available
-OPENAI_AVAILABLE = False
-try:
-    import openai
-    OPENAI_AVAILABLE = True
-except ImportError:
+# Check if OpenAI is available. The SDKs are imported inside the functions
+# that use them, so only look the packages up here instead of importing them.
+OPENAI_AVAILABLE = importlib.util.find_spec("openai") is not None
+if not OPENAI_AVAILABLE:
     logger.warning("OpenAI library not available. Install with: pip install openai")
 
 # Check if Anthropic is available
-ANTHROPIC_AVAILABLE = False
-try:
-    import anthropic
-    ANTHROPIC_AVAILABLE = True
-except ImportError:
+ANTHROPIC_AVAILABLE = importlib.util.find_spec("anthropic") is not None
+if not ANTHROPIC_AVAILABLE:
     logger.warning("Anthropic library not available. Install with: pip install anthropic")
 
-def generate_with_openai_direct_pdf(model: str, prompt: str, pdf_path: str = None) -> str:
+# SDK clients keep a connection pool, so one client per provider and API key
+# is built on first use and shared by every later call (they are thread-safe).
+# They retry 429/5xx/connection errors with exponential backoff (honouring
+# Retry-After) and give up on a hung request after the timeout
+_API_MAX_RETRIES = 5
+_API_TIMEOUT = 60.0
+_clients: Dict[Tuple[str, str], object] = {}
+_clients_lock = threading.Lock()
+
+def _anthropic_client(api_key: str):
+    """Shared anthropic.Anthropic client for api_key"""
+    with _clients_lock:
+        client = _clients.get(("anthropic", api_key))
+        if client is None:
+            import anthropic
+            client = _clients[("anthropic", api_key)] = anthropic.Anthropic(
+                api_key=api_key, max_retries=_API_MAX_RETRIES, timeout=_API_TIMEOUT)
+        return client
+
+def _openai_client(api_key: str):
+    """Shared openai.OpenAI client for api_key"""
+    with _clients_lock:
+        client = _clients.get(("openai", api_key))
+        if client is None:
+            import openai
+            client = _clients[("openai", api_key)] = openai.OpenAI(
+                api_key=api_key, max_retries=_API_MAX_RETRIES, timeout=_API_TIMEOUT)
+        return client
+
+# Whether this thread's last multi-PDF call was answered by its primary request
+# rather than one of the degraded fallbacks; callers that cache responses check it
+_call_state = threading.local()
+
+def last_response_was_primary() -> bool:
+    """True if the last generate_with_multiple_pdfs_* call on this thread took the primary path"""
+    return getattr(_call_state, "primary", False)
+
+# Anthropic Files API: each distinct PDF is uploaded once per session and then
+# referenced by file_id instead of being base64-inlined into every request
+_CLAUDE_FILES_BETA = "files-api-2025-04-14"
+_claude_file_ids: Dict[str, str] = {}  # sha256 of PDF bytes -> file_id
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _claude_pdf_source(client, pdf_path: str) -> Dict:
+    """Return a document source block for pdf_path, preferring an uploaded file_id.
+
+    Falls back to inline base64 if the SDK or account has no Files API.
+    """
+    try:
+        digest = _file_sha256(pdf_path)
+        file_id = _claude_file_ids.get(digest)
+        if file_id is None:
+            with open(pdf_path, 'rb') as f:
+                uploaded = client.beta.files.upload(
+                    file=(os.path.basename(pdf_path), f, "application/pdf"),
+                    betas=[_CLAUDE_FILES_BETA]
+                )
+            file_id = _claude_file_ids[digest] = uploaded.id
+            logger.info(f"Uploaded {os.path.basename(pdf_path)} to Anthropic Files API ({file_id})")
+        return {"type": "file", "file_id": file_id}
+    except Exception as e:
+        logger.warning(f"Files API unavailable for {os.path.basename(pdf_path)}, sending inline: {e}")
+        with open(pdf_path, 'rb') as pdf_file:
+            pdf_b64 = base64.b64encode(pdf_file.read()).decode('utf-8')
+        return {"type": "base64", "media_type": "application/pdf", "data": pdf_b64}
+
+def generate_with_openai_direct_pdf(model: str, prompt: str, pdf_path: str = None,
+                                    max_tokens: int = 4000) -> str:
     """
     Generate response using OpenAI API with direct PDF processing (no image conversion)
     
@@ -38,20 +109,19 @@ def generate_with_openai_direct_pdf(model: str, prompt: str, pdf_path: str = Non
         model: Model name (e.g., 'gpt-4-turbo-preview', 'gpt-4')
         prompt: Input prompt
         pdf_path: Path to PDF file to analyze directly
+        max_tokens: Upper bound on the length of the response
         
     Returns:
         Generated text response
     """
     try:
-        import openai
-        
         # Get API key from environment
         api_key = os.getenv("OPENAI_API_KEY")
         if not api_key:
             raise ValueError("OPENAI_API_KEY environment variable not set")
         
         # Initialize client
-        client = openai.OpenAI(api_key=api_key)
+        client = _openai_client(api_key)
         
         # For text models, we need to extract text from PDF first
         if pdf_path and os.path.exists(pdf_path):
@@ -88,7 +158,7 @@ Note: The above text was extracted from the PDF for context. Use this along with
                 {"role": "user", "content": enhanced_prompt}
             ],
             temperature=0.1,
-            max_tokens=4000
+            max_tokens=max_tokens
         )
         
         return response.choices[0].message.content
@@ -99,7 +169,8 @@ Note: The above text was extracted from the PDF for context. Use this along with
         logger.error(f"OpenAI API error: {str(e)}")
         raise
 
-def generate_with_claude_direct_pdf(model: str, prompt: str, pdf_path: str = None) -> str:
+def generate_with_claude_direct_pdf(model: str, prompt: str, pdf_path: str = None,
+                                    max_tokens: int = 4000) -> str:
     """
     Generate response using Anthropic Claude API with direct PDF processing
     
@@ -107,20 +178,19 @@ def generate_with_claude_direct_pdf(model: str, prompt: str, pdf_path: str = Non
         model: Model name (e.g., 'claude-3-opus-20240229', 'claude-3-sonnet-20240229')
         prompt: Input prompt
         pdf_path: Path to PDF file to analyze directly
+        max_tokens: Upper bound on the length of the response
         
     Returns:
         Generated text response
     """
     try:
-        import anthropic
-        
         # Get API key from environment
         api_key = os.getenv("ANTHROPIC_API_KEY")
         if not api_key:
             raise ValueError("ANTHROPIC_API_KEY environment variable not set")
         
         # Initialize client
-        client = anthropic.Anthropic(api_key=api_key)
+        client = _anthropic_client(api_key)
         
         # Claude supports PDF documents directly
         if pdf_path and os.path.exists(pdf_path):
@@ -133,7 +203,7 @@ def generate_with_claude_direct_pdf(model: str, prompt: str, pdf_path: str = Non
                 # Create message with PDF document
                 response = client.messages.create(
                     model=model,
-                    max_tokens=4000,
+                    max_tokens=max_tokens,
                     temperature=0.1,
                     messages=[
                         {
@@ -176,7 +246,7 @@ Note: The above text was extracted from the PDF for context."""
                     
                     response = client.messages.create(
                         model=model,
-                        max_tokens=4000,
+                        max_tokens=max_tokens,
                         temperature=0.1,
                         messages=[
                             {"role": "user", "content": enhanced_prompt}
@@ -192,7 +262,7 @@ Note: The above text was extracted from the PDF for context."""
             # Text-only message
             response = client.messages.create(
                 model=model,
-                max_tokens=4000,
+                max_tokens=max_tokens,
                 temperature=0.1,
                 messages=[
                     {"role": "user", "content": prompt}
@@ -208,7 +278,8 @@ Note: The above text was extracted from the PDF for context."""
         raise
 
 # Enhanced backward compatibility functions that choose between direct PDF and image processing
-def generate_with_openai(model: str, prompt: str, pdf_path: str = None, mapping_pdf_path: str = None) -> str:
+def generate_with_openai(model: str, prompt: str, pdf_path: str = None, mapping_pdf_path: str = None,
+                         max_tokens: int = 4000) -> str:
     """
     Enhanced OpenAI generation with intelligent PDF processing selection
     
@@ -217,6 +288,7 @@ def generate_with_openai(model: str, prompt: str, pdf_path: str = None, mapping_
         prompt: Input prompt
         pdf_path: Optional path to filled PDF file to analyze
         mapping_pdf_path: Optional path to numbered mapping PDF for reference
+        max_tokens: Upper bound on the length of the response
         
     Returns:
         Generated text response
@@ -226,14 +298,15 @@ def generate_with_openai(model: str, prompt: str, pdf_path: str = None, mapping_
     if model in ['gpt-4-turbo-preview', 'gpt-4-turbo', 'gpt-4o'] and pdf_path and not mapping_pdf_path:
         try:
             logger.info(f"Using direct PDF processing with {model}")
-            return generate_with_openai_direct_pdf(model, prompt, pdf_path)
+            return generate_with_openai_direct_pdf(model, prompt, pdf_path, max_tokens)
         except Exception as e:
             logger.warning(f"Direct PDF processing failed: {e}, falling back to image processing")
     
     # Fall back to original image-based processing for backward compatibility
-    return generate_with_openai_legacy(model, prompt, pdf_path, mapping_pdf_path)
+    return generate_with_openai_legacy(model, prompt, pdf_path, mapping_pdf_path, max_tokens)
 
-def generate_with_claude(model: str, prompt: str, pdf_path: str = None, mapping_pdf_path: str = None) -> str:
+def generate_with_claude(model: str, prompt: str, pdf_path: str = None, mapping_pdf_path: str = None,
+                         max_tokens: int = 4000) -> str:
     """
     Enhanced Claude generation with intelligent PDF processing selection
     
@@ -242,6 +315,7 @@ def generate_with_claude(model: str, prompt: str, pdf_path: str = None, mapping_
         prompt: Input prompt
         pdf_path: Optional path to filled PDF file to analyze
         mapping_pdf_path: Optional path to numbered mapping PDF for reference
+        max_tokens: Upper bound on the length of the response
         
     Returns:
         Generated text response
@@ -251,29 +325,27 @@ def generate_with_claude(model: str, prompt: str, pdf_path: str = None, mapping_
     if pdf_path and not mapping_pdf_path:
         try:
             logger.info(f"Using direct PDF processing with {model}")
-            return generate_with_claude_direct_pdf(model, prompt, pdf_path)
+            return generate_with_claude_direct_pdf(model, prompt, pdf_path, max_tokens)
         except Exception as e:
             logger.warning(f"Direct PDF processing failed: {e}, falling back to legacy processing")
     
     # Fall back to original processing for backward compatibility
-    return generate_with_claude_legacy(model, prompt, pdf_path, mapping_pdf_path)
+    return generate_with_claude_legacy(model, prompt, pdf_path, mapping_pdf_path, max_tokens)
 
 # Legacy functions (original image-based processing) for backward compatibility
-def generate_with_openai_legacy(model: str, prompt: str, pdf_path: str = None, mapping_pdf_path: str = None) -> str:
+def generate_with_openai_legacy(model: str, prompt: str, pdf_path: str = None, mapping_pdf_path: str = None,
+                                max_tokens: int = 4000) -> str:
     """
     Original OpenAI generation with image-based PDF processing
     """
     try:
-        import openai
-        import base64
-        
         # Get API key from environment
         api_key = os.getenv("OPENAI_API_KEY")
         if not api_key:
             raise ValueError("OPENAI_API_KEY environment variable not set")
         
         # Initialize client
-        client = openai.OpenAI(api_key=api_key)
+        client = _openai_client(api_key)
         
         # Prepare message content
         if pdf_path or mapping_pdf_path:
@@ -333,7 +405,7 @@ def generate_with_openai_legacy(model: str, prompt: str, pdf_path: str = None, m
                             {"role": "user", "content": content}
                         ],
                         temperature=0.1,
-                        max_tokens=4000
+                        max_tokens=max_tokens
                     )
                     
                     return response.choices[0].message.content
@@ -353,7 +425,7 @@ def generate_with_openai_legacy(model: str, prompt: str, pdf_path: str = None, m
                 {"role": "user", "content": prompt}
             ],
             temperature=0.1,
-            max_tokens=4000
+            max_tokens=max_tokens
         )
         
         return response.choices[0].message.content
@@ -364,21 +436,19 @@ def generate_with_openai_legacy(model: str, prompt: str, pdf_path: str = None, m
         logger.error(f"OpenAI API error: {str(e)}")
         raise
 
-def generate_with_claude_legacy(model: str, prompt: str, pdf_path: str = None, mapping_pdf_path: str = None) -> str:
+def generate_with_claude_legacy(model: str, prompt: str, pdf_path: str = None, mapping_pdf_path: str = None,
+                                max_tokens: int = 4000) -> str:
     """
     Original Claude generation with image-based PDF processing
     """
     try:
-        import anthropic
-        import base64
-        
         # Get API key from environment
         api_key = os.getenv("ANTHROPIC_API_KEY")
         if not api_key:
             raise ValueError("ANTHROPIC_API_KEY environment variable not set")
         
         # Initialize client
-        client = anthropic.Anthropic(api_key=api_key)
+        client = _anthropic_client(api_key)
         
         # Claude supports PDF documents directly
         try:
@@ -418,7 +488,7 @@ def generate_with_claude_legacy(model: str, prompt: str, pdf_path: str = None, m
             
             response = client.messages.create(
                 model=model,
-                max_tokens=4000,
+                max_tokens=max_tokens,
                 temperature=0.1,
                 messages=[
                     {"role": "user", "content": content}
@@ -433,7 +503,7 @@ def generate_with_claude_legacy(model: str, prompt: str, pdf_path: str = None, m
             # Fallback to text-only
             response = client.messages.create(
                 model=model,
-                max_tokens=4000,
+                max_tokens=max_tokens,
                 temperature=0.1,
                 messages=[
                     {"role": "user", "content": prompt}
@@ -449,21 +519,24 @@ def generate_with_claude_legacy(model: str, prompt: str, pdf_path: str = None, m
         raise
 
 # Multi-PDF processing functions
-def generate_with_multiple_pdfs_openai(model: str, prompt: str, pdf_files: List[str], mapping_pdf_path: str = None) -> str:
+def generate_with_multiple_pdfs_openai(model: str, prompt: str, pdf_files: List[str], mapping_pdf_path: str = None,
+                                       json_mode: bool = False) -> str:
     """
     Generate response using OpenAI API with multiple PDF files
+
+    With json_mode the request sets response_format json_object, so the
+    single response for all fields is guaranteed to be one parseable JSON object.
     """
+    json_args = {"response_format": {"type": "json_object"}} if json_mode else {}
+    _call_state.primary = False
     try:
-        import openai
-        import base64
-        
         # Get API key from environment
         api_key = os.getenv("OPENAI_API_KEY")
         if not api_key:
             raise ValueError("OPENAI_API_KEY environment variable not set")
         
         # Initialize client
-        client = openai.OpenAI(api_key=api_key)
+        client = _openai_client(api_key)
         
         # Convert PDFs to images for vision processing
         try:
@@ -563,9 +636,11 @@ Do not prioritize any single document. Each document contains important data tha
                         {"role": "user", "content": content}
                     ],
                     temperature=0.1,
-                    max_tokens=4000
+                    max_tokens=4000,
+                    **json_args
                 )
                 
+                _call_state.primary = True
                 return response.choices[0].message.content
             
         except ImportError:
@@ -598,12 +673,13 @@ Do not prioritize any single document. Each document contains important data tha
                     enhanced_prompt += f"\n\nEXTRACTED TEXT FROM {len(text_extracts)} DOCUMENTS:\n\n{combined_text[:30000]}"
                     
                     # Call OpenAI with the text-based fallback
-                    client = openai.OpenAI(api_key=api_key)
+                    client = _openai_client(api_key)
                     response = client.chat.completions.create(
                         model=model,
                         messages=[{"role": "user", "content": enhanced_prompt}],
                         temperature=0.1,
-                        max_tokens=4000
+                        max_tokens=4000,
+                        **json_args
                     )
                     return response.choices[0].message.content
             except Exception as text_e:
@@ -646,21 +722,26 @@ Do not prioritize any single document. Each document contains important data tha
             logger.error("⚠️ Final fallback: using only first PDF")
             return generate_with_openai(model, prompt, pdf_files[0] if pdf_files else None, mapping_pdf_path)
 
-def generate_with_multiple_pdfs_claude(model: str, prompt: str, pdf_files: List[str], mapping_pdf_path: str = None) -> str:
+def generate_with_multiple_pdfs_claude(model: str, prompt: str, pdf_files: List[str], mapping_pdf_path: str = None,
+                                       prompt_prefix: str = None) -> str:
     """
     Generate response using Anthropic Claude API with multiple PDF files
+
+    If prompt_prefix is given it is sent ahead of the mapping PDF and the
+    per-request prompt, and both are marked with cache_control so repeat
+    calls for the same form read them from Anthropic's prompt cache.
     """
+    # Fallback paths below send a single text prompt, so they need the full one
+    full_prompt = prompt_prefix + prompt if prompt_prefix else prompt
+    _call_state.primary = False
     try:
-        import anthropic
-        import base64
-        
         # Get API key from environment
         api_key = os.getenv("ANTHROPIC_API_KEY")
         if not api_key:
             raise ValueError("ANTHROPIC_API_KEY environment variable not set")
         
         # Initialize client
-        client = anthropic.Anthropic(api_key=api_key)
+        client = _anthropic_client(api_key)
         
         # Claude supports PDF documents directly
         try:
@@ -684,6 +765,13 @@ Do not prioritize any single document. Each document contains important data tha
                 "type": "text",
                 "text": enhanced_prompt
             }]
+            if prompt_prefix:
+                # Static per-form text goes first so it forms a cacheable prefix
+                content.insert(0, {
+                    "type": "text",
+                    "text": prompt_prefix,
+                    "cache_control": {"type": "ephemeral"}
+                })
             
             # Add mapping PDF first if provided - with enhanced instructions
             if mapping_pdf_path and os.path.exists(mapping_pdf_path):
@@ -712,18 +800,16 @@ The NUMBERED MAPPING PDF ({mapping_pdf_name}) shows all form fields with their n
                 content[0]["text"] = enhanced_prompt
                 
                 # Now add the actual mapping PDF
-                with open(mapping_pdf_path, 'rb') as pdf_file:
-                    pdf_data = pdf_file.read()
-                
-                pdf_b64 = base64.b64encode(pdf_data).decode('utf-8')
-                content.append({
+                mapping_block = {
                     "type": "document",
-                    "source": {
-                        "type": "base64",
-                        "media_type": "application/pdf",
-                        "data": pdf_b64
-                    }
-                })
+                    "source": _claude_pdf_source(client, mapping_pdf_path)
+                }
+                if prompt_prefix:
+                    # Keep the mapping PDF inside the cached prefix, ahead of the per-request text
+                    mapping_block["cache_control"] = {"type": "ephemeral"}
+                    content.insert(1, mapping_block)
+                else:
+                    content.append(mapping_block)
                 logger.info(f"Added mapping PDF with {page_count} pages and mapping instructions")
             
             # Add source PDFs with enhanced logging
@@ -738,17 +824,9 @@ The NUMBERED MAPPING PDF ({mapping_pdf_name}) shows all form fields with their n
                     logger.info(f"Processing PDF {i+1}/{len(pdf_files)}: {pdf_name} ({pdf_size_mb:.2f} MB)")
                     
                     try:
-                        with open(pdf_file, 'rb') as file:
-                            pdf_data = file.read()
-                        
-                        pdf_b64 = base64.b64encode(pdf_data).decode('utf-8')
                         content.append({
                             "type": "document",
-                            "source": {
-                                "type": "base64",
-                                "media_type": "application/pdf",
-                                "data": pdf_b64
-                            }
+                            "source": _claude_pdf_source(client, pdf_file)
                         })
                         logger.info(f"✓ Successfully added {pdf_name} to Claude request (document #{len(content)-1})")
                     except Exception as e:
@@ -757,15 +835,27 @@ The NUMBERED MAPPING PDF ({mapping_pdf_name}) shows all form fields with their n
                 else:
                     logger.error(f"❌ PDF file does not exist: {pdf_file}")
             
-            response = client.messages.create(
+            # file_id sources are only accepted on the beta endpoint with the Files API flag
+            uses_files = any(block.get("source", {}).get("type") == "file" for block in content)
+            messages_api = client.beta.messages if uses_files else client.messages
+            extra_args = {"betas": [_CLAUDE_FILES_BETA]} if uses_files else {}
+            response = messages_api.create(
                 model=model,
                 max_tokens=4000,
                 temperature=0.1,
                 messages=[
                     {"role": "user", "content": content}
-                ]
+                ],
+                **extra_args
             )
             
+            # cache_read/cache_write show whether the cached prefix and mapping PDF were reused
+            usage = getattr(response, "usage", None)
+            if usage is not None:
+                logger.info(f"Claude usage: input={usage.input_tokens}, "
+                            f"cache_read={getattr(usage, 'cache_read_input_tokens', 0)}, "
+                            f"cache_write={getattr(usage, 'cache_creation_input_tokens', 0)}")
+            _call_state.primary = True
             return response.content[0].text
             
         except Exception as e:
@@ -776,7 +866,7 @@ The NUMBERED MAPPING PDF ({mapping_pdf_name}) shows all form fields with their n
                 logger.info("Attempting text extraction fallback for all documents with Claude")
                 
                 # Add stronger emphasis in prompt for multiple documents
-                enhanced_prompt = prompt + f"\n\n**CRITICAL INSTRUCTION: There was an error processing multiple PDFs. You MUST still try to extract data from ALL {len(pdf_files)} documents thoroughly!**"
+                enhanced_prompt = full_prompt + f"\n\n**CRITICAL INSTRUCTION: There was an error processing multiple PDFs. You MUST still try to extract data from ALL {len(pdf_files)} documents thoroughly!**"
                 
                 # Try to extract text from all PDFs as a fallback
                 import PyPDF2
@@ -818,7 +908,7 @@ The NUMBERED MAPPING PDF ({mapping_pdf_name}) shows all form fields with their n
             
             # Last resort: use the first PDF only, but with a warning
             logger.warning("⚠️ All fallbacks failed, using only first PDF with Claude as last resort")
-            return generate_with_claude(model, prompt + "\n\n**WARNING: Only first document processed due to technical issues**",
+            return generate_with_claude(model, full_prompt + "\n\n**WARNING: Only first document processed due to technical issues**",
                                       pdf_files[0] if pdf_files else None, mapping_pdf_path)
         
     except Exception as e:
@@ -826,12 +916,12 @@ The NUMBERED MAPPING PDF ({mapping_pdf_name}) shows all form fields with their n
         
         # Attempt last-ditch effort with enhanced prompt
         try:
-            enhanced_prompt = prompt + "\n\n**SYSTEM ALERT: Multi-PDF processing error occurred. This is critical: You MUST still try to extract from ALL documents!**"
+            enhanced_prompt = full_prompt + "\n\n**SYSTEM ALERT: Multi-PDF processing error occurred. This is critical: You MUST still try to extract from ALL documents!**"
             return generate_with_claude(model, enhanced_prompt, pdf_files[0] if pdf_files else None, mapping_pdf_path)
         except:
             # Absolute last resort
             logger.error("⚠️ Final fallback: using only first PDF with Claude")
-            return generate_with_claude(model, prompt, pdf_files[0] if pdf_files else None, mapping_pdf_path)
+            return generate_with_claude(model, full_prompt, pdf_files[0] if pdf_files else None, mapping_pdf_path)
 
 # Utility functions
 def create_enhanced_extraction_prompt(field_names: List[str], field_descriptions: List[str], text: str) -> str:
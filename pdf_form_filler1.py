@@ -8,29 +8,40 @@ Description: A PyQt6 GUI application for filling any fillable PDF form with AI-p
 import sys
 import json
 import subprocess
-import tempfile
 import os
 import re
 import base64
 import logging
 import llm_client
 import traceback
+import threading
+import collections
+import time
+import hashlib
+import concurrent.futures
+import importlib.util
 try:
     import dotenv
 except ImportError:
     dotenv = None
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple, Union, Any
+from typing import Callable, Dict, List, Optional, Tuple, Union, Any
 from dataclasses import dataclass, asdict
 
-# Set up logging
-logging.basicConfig(
-    filename='pdf_form_filler_debug.log',
-    level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# Logging is configured in main() so importing this module has no side effects
 logger = logging.getLogger('PDF_Form_Filler')
-logger.info("Application starting")
+
+_MODULE_DIR = os.path.dirname(os.path.abspath(__file__))
+_HISTORY_PATH = os.path.join(_MODULE_DIR, "paths_history.json")
+# On-disk cache of raw LLM responses keyed by a hash of the whole request.
+# Off by default: responses hold extracted case data in plain text. Set
+# PDF_FORM_FILLER_LLM_CACHE=1 to enable it; delete _LLM_CACHE_DIR to clear it.
+USE_LLM_CACHE = os.environ.get("PDF_FORM_FILLER_LLM_CACHE", "0") == "1"
+_LLM_CACHE_DIR = Path("~/.pdf_form_filler/llm_cache").expanduser()
+_LLM_CACHE_TTL = 7 * 24 * 3600  # seconds
+# Extracted form fields keyed by PDF path, validated against mtime and size
+_FIELDS_CACHE_PATH = Path("~/.pdf_form_filler/fields_cache.json").expanduser()
+_FIELDS_CACHE_LIMIT = 64
 
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, QWidget,
@@ -39,10 +50,16 @@ from PyQt6.QtWidgets import (
     QMessageBox, QProgressBar, QGroupBox, QScrollArea,
     QGridLayout, QComboBox, QSpinBox, QCheckBox, QListWidget,
     QListWidgetItem, QPlainTextEdit, QFrame, QSizePolicy, QRadioButton,
-    QInputDialog
+    QInputDialog, QDialog, QDialogButtonBox
+)
+from PyQt6.QtCore import (
+    Qt, QObject, QThread, QRunnable, QThreadPool, pyqtSignal, pyqtSlot,
+    QSettings, QTimer, QSignalBlocker, QUrl, QRegularExpression,
+    QStringListModel
+)
+from PyQt6.QtGui import (
+    QFont, QIcon, QPalette, QColor, QPixmap, QDesktopServices, QTextCursor, QTextDocument
 )
-from PyQt6.QtCore import Qt, QThread, pyqtSignal, QSettings, QTimer
-from PyQt6.QtGui import QFont, QIcon, QPalette, QColor, QPixmap
 
 # Import field mapping widget
 try:
@@ -56,7 +73,7 @@ except ImportError:
     @dataclass
     class FormField:
         name: str
-        field_type: str = "Text"
+        type: str = "Text"  # same keywords as fieldmappingwidget.FormField
         alt_text: str = ""
         flags: int = 0
         justification: str = "Left"
@@ -83,47 +100,271 @@ except ImportError:
         def get_field_data(self):
             return {}
         
+        def get_nonempty_field_data(self):
+            return iter(())
+        
+        def nonempty_field_data(self):
+            return {}
+        
+        def count_nonempty(self):
+            return 0
+        
         def set_field_data(self, data):
             pass
 
-# AI/ML Imports with error handling
-try:
-    import openai
-    OPENAI_AVAILABLE = True
-    print("✅ OpenAI library available")
-except ImportError:
-    OPENAI_AVAILABLE = False
-    print("⚠️ OpenAI library not available")
+# AI/ML and optional dependencies are only looked up here; the packages are
+# imported where they are used so startup does not pay for unused providers
+def _has_modules(*names: str) -> bool:
+    return all(importlib.util.find_spec(name) is not None for name in names)
+
+OPENAI_AVAILABLE = _has_modules("openai")
+ANTHROPIC_AVAILABLE = _has_modules("anthropic")
+OCR_AVAILABLE = _has_modules("PIL", "pytesseract")
+LXML_AVAILABLE = _has_modules("lxml")
+WEB_SCRAPING_AVAILABLE = _has_modules("requests") and (LXML_AVAILABLE or _has_modules("bs4"))
+PDF_TEXT_AVAILABLE = _has_modules("PyPDF2", "pdfplumber")
+IJSON_AVAILABLE = _has_modules("ijson")
+
+# Characters of PDF/web page text to collect for the prompt (2x its 8000-char cap)
+_PDF_TEXT_BUDGET = 16000
+_URL_TEXT_BUDGET = 16000
+# Block-level HTML elements whose text is kept when streaming a web page
+_URL_TEXT_TAGS = ('title', 'h1', 'h2', 'h3', 'h4', 'p', 'li', 'td', 'th')
 
 try:
-    import anthropic
-    ANTHROPIC_AVAILABLE = True
-    print("✅ Anthropic library available")
+    import fitz  # PyMuPDF
+    PYMUPDF_AVAILABLE = True
 except ImportError:
-    ANTHROPIC_AVAILABLE = False
-    print("⚠️ Anthropic library not available")
+    PYMUPDF_AVAILABLE = False
 
-# Optional imports
 try:
-    from PIL import Image
-    import pytesseract
-    OCR_AVAILABLE = True
+    import pikepdf
+    PIKEPDF_AVAILABLE = True
 except ImportError:
-    OCR_AVAILABLE = False
+    PIKEPDF_AVAILABLE = False
 
-try:
-    import requests
-    from bs4 import BeautifulSoup
-    WEB_SCRAPING_AVAILABLE = True
-except ImportError:
-    WEB_SCRAPING_AVAILABLE = False
+# In-process AcroForm reads/writes with pikepdf instead of spawning pdftk (a JVM
+# on most installs). Set PDF_FORM_FILLER_USE_PIKEPDF=0 to force pdftk.
+USE_PIKEPDF = PIKEPDF_AVAILABLE and os.environ.get("PDF_FORM_FILLER_USE_PIKEPDF", "1") != "0"
+_PIKEPDF_FIELD_TYPES = {"/Tx": "Text", "/Btn": "Button", "/Ch": "Choice", "/Sig": "Signature"}
+_JUSTIFICATIONS = ("Left", "Center", "Right")
+# Button values that leave a checkbox unchecked; any other value checks it
+_BUTTON_OFF_VALUES = frozenset(("0", "off", "no", "false"))
+
+def _iter_pikepdf_fields(fields, parent_name: str = "", inherited: Dict[str, Any] = None):
+    """Yield (full_name, field, widgets, attrs) for every terminal AcroForm field.
 
+    full_name is the dotted name pdftk reports; attrs carries the inheritable
+    /FT, /Ff and /Q entries resolved from the field's ancestors.
+    """
+    inherited = inherited or {}
+    for field in fields:
+        partial = str(field.get("/T", ""))
+        name = f"{parent_name}.{partial}" if parent_name and partial else (partial or parent_name)
+        attrs = dict(inherited)
+        for key in ("/FT", "/Ff", "/Q"):
+            if key in field:
+                attrs[key] = field[key]
+        kids = field.get("/Kids")
+        child_fields = [kid for kid in kids if "/T" in kid] if kids is not None else []
+        if child_fields:
+            yield from _iter_pikepdf_fields(child_fields, name, attrs)
+        else:
+            # Kids without /T are the field's widget annotations
+            yield name, field, (list(kids) if kids is not None else [field]), attrs
+
+def _normal_appearance_states(widget) -> Optional[Any]:
+    """Return a widget's /AP /N dictionary (its on/off states) if it has one."""
+    ap = widget.get("/AP")
+    normal = ap.get("/N") if ap is not None else None
+    return normal if isinstance(normal, pikepdf.Dictionary) else None
+
+# Fast JSON for history/mapping files and AI prompts/responses; _dumps returns UTF-8 bytes
 try:
-    import PyPDF2
-    import pdfplumber
-    PDF_TEXT_AVAILABLE = True
+    import orjson
+
+    def _dumps(obj: Any, indent: bool = True) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+
+    _loads = orjson.loads
 except ImportError:
-    PDF_TEXT_AVAILABLE = False
+    orjson = None
+
+    def _dumps(obj: Any, indent: bool = True) -> bytes:
+        if indent:
+            return json.dumps(obj, indent=2, ensure_ascii=False).encode('utf-8')
+        return json.dumps(obj, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+    _loads = json.loads
+
+# Model choices offered for each AI provider
+_AI_MODEL_NAMES = {
+    "openai": [
+        "gpt-4o",
+        "gpt-4-turbo",
+        "gpt-4",
+        "gpt-3.5-turbo"
+    ],
+    "anthropic": [
+        "claude-3-5-sonnet-20240620",
+        "claude-3-opus-20240229",
+        "claude-3-sonnet-20240229",
+        "claude-3-haiku-20240307"
+    ],
+    # Pattern matching has no model selection
+    "pattern": ["Pattern Matching (No Model)"],
+}
+
+# First/last non-whitespace character of the pasted AI text source
+_NON_SPACE_RE = QRegularExpression(r"\S")
+
+# File pickers use Qt's own dialog by default; the platform one enumerates
+# directories synchronously and can stall the UI on network mounts. Set
+# PDF_FORM_FILLER_NATIVE_DIALOGS=1 to use the platform dialog instead.
+USE_NATIVE_DIALOGS = os.environ.get("PDF_FORM_FILLER_NATIVE_DIALOGS", "0") == "1"
+
+# File-dialog name filters
+_PDF_FILTER = "PDF Files (*.pdf)"
+_JSON_FILTER = "JSON Files (*.json)"
+_DATA_FILTER = ("All Supported (*.pdf *.txt *.json *.csv *.md);;PDF Files (*.pdf);;Text Files (*.txt);;"
+                "JSON Files (*.json);;CSV Files (*.csv)")
+_IMAGE_FILTER = "Image Files (*.png *.jpg *.jpeg *.tiff *.bmp *.gif)"
+
+# Stylesheets are parsed by Qt on every setStyleSheet call; keep them as
+# module constants so apply_theme never rebuilds them.
+_THEME_QSS = """
+    QMainWindow {
+        background-color: #f5f5f5;
+    }
+    QPushButton {
+        background-color: #2196F3;
+        color: white;
+        border: none;
+        padding: 8px 16px;
+        border-radius: 4px;
+        font-weight: bold;
+    }
+    QPushButton:hover {
+        background-color: #1976D2;
+    }
+    QPushButton:disabled {
+        background-color: #cccccc;
+    }
+    QGroupBox {
+        font-weight: bold;
+        border: 2px solid #cccccc;
+        border-radius: 5px;
+        margin: 10px 0px;
+        padding-top: 10px;
+    }
+    QGroupBox::title {
+        subcontrol-origin: margin;
+        left: 10px;
+        padding: 0 5px 0 5px;
+    }
+    QLineEdit {
+        border: 1px solid #ddd;
+        border-radius: 4px;
+        padding: 6px;
+    }
+    QLineEdit:focus {
+        border-color: #2196F3;
+    }
+"""
+
+_TAB_QSS = """
+    QTabWidget::pane {
+        border: 1px solid #cccccc;
+    }
+    QTabBar::tab {
+        background-color: #e0e0e0;
+        padding: 8px 16px;
+        margin-right: 2px;
+    }
+    QTabBar::tab:selected {
+        background-color: #2196F3;
+        color: white;
+    }
+"""
+
+# Fallback extraction patterns: (pattern_type, keywords matched against the
+# field name/alt text, compiled regex). Compiled once at import.
+_PATTERNS = [
+    (pattern_type, tuple(pattern_type.split('_')), re.compile(pattern, re.IGNORECASE))
+    for pattern_type, pattern in (
+        ('attorney_name', r'attorney.*?([A-Z][a-z]+ [A-Z][a-z]+)'),
+        ('petitioner_name', r'petitioner.*?([A-Z][a-z]+ [A-Z][a-z]+)'),
+        ('respondent_name', r'respondent.*?([A-Z][a-z]+ [A-Z][a-z]+)'),
+        ('case_number', r'case.*?number.*?([A-Z0-9]+)'),
+        ('court_county', r'county of\s+([A-Z\s]+)'),
+        ('student_loan', r'student.*?loan.*?\$?\s*([0-9,]+\.?[0-9]*)'),
+        ('credit_card', r'credit.*?card.*?\$?\s*([0-9,]+\.?[0-9]*)'),
+        ('total_debt', r'total.*?debt.*?\$?\s*([0-9,]+\.?[0-9]*)'),
+        ('phone', r'\((\d{3})\)\s*(\d{3})-(\d{4})'),
+        ('address', r'(\d+\s+[A-Za-z\s]+(Street|St|Avenue|Ave|Road|Rd|Drive|Dr))'),
+    )
+]
+# Every pattern keyword occurring in a lowercased field text, found in one scan.
+# The lookahead reports overlapping hits, matching the old per-keyword `in` tests.
+_PATTERN_KEYWORD_RE = re.compile(
+    "(?=(" + "|".join(sorted({re.escape(word) for _, keywords, _ in _PATTERNS for word in keywords})) + "))"
+)
+
+def _intern_pairs(pairs: List[Tuple[str, Any]]) -> Dict[str, Any]:
+    """object_pairs_hook that interns keys; field keys repeat in data and score maps."""
+    return {sys.intern(key): value for key, value in pairs}
+
+_RESPONSE_DECODER = json.JSONDecoder(object_pairs_hook=_intern_pairs)
+
+def _find_response_object(text: str) -> Optional[Dict[str, Any]]:
+    """Return the first complete JSON object in text that has an extracted_data key.
+
+    Used when the response wraps the answer in prose, code fences or extra
+    JSON fragments, so the span from the first '{' to the last '}' is not valid.
+    """
+    pos = text.find('{')
+    while pos != -1:
+        try:
+            obj, end = _RESPONSE_DECODER.raw_decode(text, pos)
+        except json.JSONDecodeError:
+            pos = text.find('{', pos + 1)
+            continue
+        if isinstance(obj, dict) and "extracted_data" in obj:
+            return obj
+        pos = text.find('{', end)
+    return None
+
+def _build_trigram_index(names_lower: List[str]) -> Tuple[Dict[str, set], List[int]]:
+    """Map each trigram to the indices of the names containing it.
+
+    Names shorter than a trigram can't be indexed; their indices are
+    returned separately because they are candidates for every key.
+    """
+    trigrams = collections.defaultdict(set)
+    short_indices = []
+    for idx, nl in enumerate(names_lower):
+        if len(nl) < 3:
+            short_indices.append(idx)
+        for i in range(len(nl) - 2):
+            trigrams[nl[i:i + 3]].add(idx)
+    return trigrams, short_indices
+
+def _fuzzy_match_index(key_lower: str, names_lower: List[str], trigrams: Dict[str, set],
+                       short_indices: List[int]) -> Optional[int]:
+    """Index of the first name that contains key_lower or is contained in it, or None."""
+    if len(key_lower) >= 3:
+        # Any substring match (either direction) of length >= 3 shares a trigram
+        candidates = set(short_indices)
+        for j in range(len(key_lower) - 2):
+            candidates |= trigrams.get(key_lower[j:j + 3], set())
+        candidates = sorted(candidates)
+    else:
+        candidates = range(len(names_lower))
+    for i in candidates:
+        name_lc = names_lower[i]
+        if key_lower in name_lc or name_lc in key_lower:
+            return i
+    return None
 
 @dataclass
 class DataSource:
@@ -140,22 +381,33 @@ class DataSource:
         if self.confidence_scores is None:
             self.confidence_scores = {}
 
-class AIDataExtractor(QThread):
+class AIDataExtractor(QObject):
     """
-    Thread for AI-powered data extraction from various sources.
+    Worker for AI-powered data extraction from various sources.
     This version is ENHANCED to use the advanced llm_client.py for multi-document processing.
+
+    MainWindow keeps a single instance on a long-lived QThread and queues
+    jobs to the extract() slot, so no thread is created per extraction.
     """
-    data_extracted = pyqtSignal(dict, dict)  # extracted_data, confidence_scores
+    # object rather than dict: a queued dict signal converts both payloads to
+    # QVariantMap and back, while object hands the same Python dicts across
+    data_extracted = pyqtSignal(object, object)  # extracted_data, confidence_scores
     error_occurred = pyqtSignal(str)
     progress_updated = pyqtSignal(int, str)  # progress, status_message
     show_message = pyqtSignal(str, str)  # title, message for safe UI thread display
 
-    def __init__(self, sources: List[DataSource], form_fields: List[FormField],
+    def __init__(self, raw_sources: List[Tuple[str, str, str]] = None, form_fields: List[FormField] = None,
                  ai_provider: str = "openai", api_key: str = "", model: str = "",
-                 mapping_pdf_path: str = None, fieldname_to_number_map: Dict = None):
+                 mapping_pdf_path: str = None, fieldname_to_number_map: Dict = None,
+                 direct_text: str = ""):
         super().__init__()
-        self.sources = sources
-        self.form_fields = form_fields
+        self._cancel_event = threading.Event()
+        # (source_type, content) tuples; DataSource objects are built in run()
+        # so the GUI thread does no per-source work.
+        self.raw_sources = raw_sources or []
+        self.direct_text = direct_text
+        self.sources: List[DataSource] = []
+        self.form_fields = form_fields or []
         self.ai_provider = ai_provider
         self.api_key = api_key
         self.model = model
@@ -165,33 +417,101 @@ class AIDataExtractor(QThread):
         # Add the missing attributes
         self.mapping_pdf_path = mapping_pdf_path
         self.fieldname_to_number_map = fieldname_to_number_map or {}
-        
+        self.use_response_cache = USE_LLM_CACHE
+        # (form_fields, fieldname_to_number_map, target_form_path, prefix)
+        self._prompt_prefix_cache: Optional[Tuple[Any, Any, str, str]] = None
+        # Source-ingestion threads, created on first use and kept across jobs
+        self._source_pool: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        self.response_cache_ttl = _LLM_CACHE_TTL
+
+    @pyqtSlot(object)
+    def extract(self, job: Dict[str, Any]):
+        """Run one queued extraction job; keys of job override the extractor attributes."""
+        self._cancel_event.clear()
+        for name, value in job.items():
+            setattr(self, name, value)
+        self.run()
+
+    def cancel(self):
+        """Ask the running job to stop at its next checkpoint (thread-safe)."""
+        self._cancel_event.set()
+
+    def shutdown(self):
+        """Release the source-ingestion threads; call once the worker is done."""
+        if self._source_pool is not None:
+            self._source_pool.shutdown(wait=False, cancel_futures=True)
+            self._source_pool = None
+
+    def _get_source_pool(self) -> concurrent.futures.ThreadPoolExecutor:
+        if self._source_pool is None:
+            # File reads, OCR (tesseract runs out of process) and HTTP all release
+            # the GIL, so threads scale with cores without a process pool
+            self._source_pool = concurrent.futures.ThreadPoolExecutor(
+                max_workers=os.cpu_count() or 4, thread_name_prefix="ai-source")
+        return self._source_pool
+
+    def _build_data_sources(self) -> List[DataSource]:
+        """Create DataSource objects from the raw (type, content, name) tuples."""
+        sources = []
+        if self.direct_text:
+            sources.append(DataSource("Direct Text Input", "text", self.direct_text))
+        # dict.fromkeys keeps first-seen order while dropping duplicate tuples
+        for source_type, source_content, display_name in dict.fromkeys(self.raw_sources):
+            source_name = f"{source_type.title()}: {display_name}"
+            sources.append(DataSource(source_name, source_type, source_content))
+        return sources
+
     def run(self):
         try:
             logger.info(f"AIDataExtractor v4.2: Starting extraction with {self.ai_provider}")
             self.progress_updated.emit(10, f"Initializing AI extraction with {self.ai_provider}...")
+            self.sources = self._build_data_sources()
             
             extracted_data = {}
             confidence_scores = {}
             
             # --- Key Change: Prepare file paths for the llm_client ---
             pdf_file_paths = []
-            source_text_content = ""
-            for i, source in enumerate(self.sources):
-                progress = 20 + (i * 30 // len(self.sources))
-                self.progress_updated.emit(progress, f"Preparing source: {source.name}...")
-                
+            other_sources = []
+            seen_pdfs = set()
+            skipped_pdfs = 0
+            for source in self.sources:
                 # We primarily want to pass PDF file paths directly to the new client
                 if source.source_type == 'file' and source.content.lower().endswith('.pdf'):
+                    # The same exhibit added twice (or the mapping PDF added as a
+                    # source) would be uploaded and billed twice
+                    fingerprint = self._pdf_fingerprint(source.content)
+                    if fingerprint is not None and (fingerprint in seen_pdfs or self._is_mapping_pdf(source.content)):
+                        skipped_pdfs += 1
+                        logger.info(f"Skipping duplicate PDF source: {source.content}")
+                        continue
+                    seen_pdfs.add(fingerprint)
                     pdf_file_paths.append(source.content)
                     logger.info(f"Added PDF source for direct processing: {source.content}")
                 else:
-                    # For non-PDF sources, extract text as before
-                    if source.source_type == "file": text = self._extract_from_file(source.content)
-                    elif source.source_type == "image": text = self._extract_from_image(source.content)
-                    elif source.source_type == "url": text = self._extract_from_url(source.content)
-                    else: text = source.content
-                    source_text_content += f"\n--- Start of Content from {source.name} ---\n{text}\n--- End of Content ---\n"
+                    other_sources.append(source)
+            if skipped_pdfs:
+                logger.info(f"Deduplicated {skipped_pdfs} PDF source(s)")
+
+            # For non-PDF sources, extract text as before. Disk reads, OCR and HTTP
+            # are all I/O bound, so run them side by side; map() keeps source order.
+            source_text_parts = []
+            if other_sources:
+                self.progress_updated.emit(20, f"Preparing {len(other_sources)} non-PDF sources...")
+                last_progress = 20
+                texts = self._get_source_pool().map(self._extract_source_text, other_sources)
+                for i, (source, text) in enumerate(zip(other_sources, texts), 1):
+                    progress = 20 + (i * 30 // len(other_sources))
+                    # Only cross the thread boundary when the percentage actually moves
+                    if progress != last_progress:
+                        self.progress_updated.emit(progress, f"Prepared source: {source.name}")
+                        last_progress = progress
+                    source_text_parts.append(f"\n--- Start of Content from {source.name} ---\n{text}\n--- End of Content ---\n")
+            source_text_content = "".join(source_text_parts)
+
+            if self._cancel_event.is_set():
+                logger.info("AI extraction cancelled before dispatch")
+                return
 
             if not self.target_form_path:
                 logger.warning("No target form path set. AI extraction may be less accurate.")
@@ -215,6 +535,10 @@ class AIDataExtractor(QThread):
                 logger.info("Falling back to pattern matching")
                 extracted_data, confidence_scores = self._extract_with_patterns(source_text_content)
             
+            if self._cancel_event.is_set():
+                logger.info("AI extraction cancelled; discarding results")
+                return
+
             logger.info(f"Extraction complete. Found {len(extracted_data)} fields.")
             self.progress_updated.emit(100, "AI extraction complete!")
             self.data_extracted.emit(extracted_data, confidence_scores)
@@ -224,18 +548,76 @@ class AIDataExtractor(QThread):
             logger.error(error_msg, exc_info=True)
             self.error_occurred.emit(error_msg)
 
+    @staticmethod
+    def _pdf_fingerprint(path: str) -> Optional[Tuple[int, str]]:
+        """(size, sha256 of the first and last 64 KB) identifying a PDF's content.
+
+        The tail is included because filled copies of one form often share the
+        head and differ only in incremental updates appended at the end.
+        """
+        try:
+            with open(path, 'rb') as f:
+                size = os.fstat(f.fileno()).st_size
+                digest = hashlib.sha256(f.read(65536))
+                if size > 65536:
+                    f.seek(max(65536, size - 65536))
+                    digest.update(f.read())
+        except OSError:
+            return None
+        return size, digest.hexdigest()
+
+    def _is_mapping_pdf(self, path: str) -> bool:
+        if not self.mapping_pdf_path:
+            return False
+        try:
+            return os.path.samefile(path, self.mapping_pdf_path)
+        except OSError:
+            return False
+
+    def _extract_source_text(self, source: DataSource) -> str:
+        """Return the text for a non-PDF source (runs on a worker thread)."""
+        if source.source_type == "file": return self._extract_from_file(source.content)
+        if source.source_type == "image": return self._extract_from_image(source.content)
+        if source.source_type == "url": return self._extract_from_url(source.content)
+        return source.content
+
     def _build_universal_prompt(self, additional_text_context: str) -> str:
         """Builds the prompt for the AI based on the target form's fields."""
-        
+        prefix, tail = self._build_universal_prompt_parts(additional_text_context)
+        return prefix + tail
+
+    def _build_universal_prompt_parts(self, additional_text_context: str) -> Tuple[str, str]:
+        """Split the prompt into a per-form static prefix and a per-request tail.
+
+        The prefix only depends on the target form and its field map, so
+        Anthropic can serve it from the prompt cache on repeat extractions.
+        """
+        prefix = self._prompt_prefix()
+        tail = f"""
+**Source Documents:** You will be provided with {len(self.sources)} source documents. These may include case information, financial schedules, or other data.
+
+ADDITIONAL TEXT CONTEXT (from non-PDF sources):
+{additional_text_context[:8000]}
+"""
+        return prefix, tail
+
+    def _prompt_prefix(self) -> str:
+        """Return the static prompt prefix, rebuilding it only when the form changes."""
+        # MainWindow passes new form_fields/map objects whenever a form is loaded,
+        # so identity is a cheap and exact cache key
+        cached = self._prompt_prefix_cache
+        if (cached is not None and cached[0] is self.form_fields
+                and cached[1] is self.fieldname_to_number_map and cached[2] == self.target_form_path):
+            return cached[3]
+
         # Get the field names from the loaded PDF form
         field_names = [f.name for f in self.form_fields]
         target_form_name = os.path.basename(self.target_form_path) if self.target_form_path else "the target PDF"
 
-        prompt = f"""
+        prefix = f"""
 You are an expert AI data extraction agent for a universal PDF form filling system. Your task is to extract information from multiple source documents to fill a target PDF form.
 
 **Target Form:** `{target_form_name}`
-**Source Documents:** You will be provided with {len(self.sources)} source documents. These may include case information, financial schedules, or other data.
 
 **CRITICAL INSTRUCTIONS:**
 1.  **ANALYZE ALL SOURCES:** You MUST comprehensively analyze ALL source documents provided. Do not stop after finding information in the first document.
@@ -246,18 +628,15 @@ You are an expert AI data extraction agent for a universal PDF form filling syst
 
 **TARGET FIELDS TO EXTRACT:**
 ```json
-{json.dumps(field_names, indent=2)}
+{_dumps(field_names).decode("utf-8")}
 ```
 
 **FIELD TO NUMBER REFERENCE MAP:**
 This JSON object shows you the valid field numbers you can use as keys in your output.
 ```json
-{json.dumps(self.fieldname_to_number_map, indent=2)}
+{_dumps(self.fieldname_to_number_map).decode("utf-8")}
 ```
 
-ADDITIONAL TEXT CONTEXT (from non-PDF sources):
-{additional_text_context[:8000]}
-
 OUTPUT FORMAT:
 Return a single, clean JSON object containing the extracted data and confidence scores. Do not include any other text or explanations.
 
@@ -273,7 +652,8 @@ Return a single, clean JSON object containing the extracted data and confidence
 }}
 """
         logger.debug(f"Generated AI prompt with {len(field_names)} target fields")
-        return prompt
+        self._prompt_prefix_cache = (self.form_fields, self.fieldname_to_number_map, self.target_form_path, prefix)
+        return prefix
     
     def _extract_with_anthropic_multi_doc(self, pdf_paths: List[str], text_context: str) -> Tuple[Dict[str, str], Dict[str, float]]:
         """Extract data using the enhanced llm_client with Anthropic."""
@@ -282,17 +662,25 @@ Return a single, clean JSON object containing the extracted data and confidence
         
         os.environ["ANTHROPIC_API_KEY"] = self.api_key.strip()
         
-        prompt = self._build_universal_prompt(text_context)
+        prompt_prefix, prompt = self._build_universal_prompt_parts(text_context)
         model = self.model or "claude-3-5-sonnet-20240620"
         logger.info(f"Calling llm_client.generate_with_multiple_pdfs_claude with {len(pdf_paths)} PDFs and model {model}")
 
-        # Use the powerful multi-PDF function from your llm_client
-        response_text = llm_client.generate_with_multiple_pdfs_claude(
-            model=model,
-            prompt=prompt,
-            pdf_files=pdf_paths,
-            mapping_pdf_path=self.mapping_pdf_path # Pass the map
-        )
+        cache_key = self._response_cache_key("anthropic", model, prompt_prefix + prompt, pdf_paths)
+        response_text = self._load_cached_response(cache_key)
+        if response_text is None:
+            # Use the powerful multi-PDF function from your llm_client; the static
+            # prefix and mapping PDF are sent first and marked for prompt caching
+            response_text = llm_client.generate_with_multiple_pdfs_claude(
+                model=model,
+                prompt=prompt,
+                pdf_files=pdf_paths,
+                mapping_pdf_path=self.mapping_pdf_path, # Pass the map
+                prompt_prefix=prompt_prefix
+            )
+            # A fallback answer (text-only or first PDF only) is not worth replaying
+            if llm_client.last_response_was_primary():
+                self._store_cached_response(cache_key, response_text)
         
         logger.debug(f"Received response from Claude: {len(response_text)} characters")
         return self._parse_ai_response(response_text)
@@ -308,17 +696,68 @@ Return a single, clean JSON object containing the extracted data and confidence
         model = self.model or "gpt-4o"
         logger.info(f"Calling llm_client.generate_with_multiple_pdfs_openai with {len(pdf_paths)} PDFs and model {model}")
 
-        # Use the powerful multi-PDF function from your llm_client
-        response_text = llm_client.generate_with_multiple_pdfs_openai(
-            model=model,
-            prompt=prompt,
-            pdf_files=pdf_paths,
-            mapping_pdf_path=self.mapping_pdf_path # Pass the map
-        )
+        cache_key = self._response_cache_key("openai", model, prompt, pdf_paths)
+        response_text = self._load_cached_response(cache_key)
+        if response_text is None:
+            # Use the powerful multi-PDF function from your llm_client
+            response_text = llm_client.generate_with_multiple_pdfs_openai(
+                model=model,
+                prompt=prompt,
+                pdf_files=pdf_paths,
+                mapping_pdf_path=self.mapping_pdf_path, # Pass the map
+                json_mode=True # One JSON object covering every field
+            )
+            # A fallback answer (text-only or first PDF only) is not worth replaying
+            if llm_client.last_response_was_primary():
+                self._store_cached_response(cache_key, response_text)
         
         logger.debug(f"Received response from OpenAI: {len(response_text)} characters")
         return self._parse_ai_response(response_text)
         
+    def _response_cache_key(self, provider: str, model: str, prompt: str, pdf_paths: List[str]) -> str:
+        """SHA-256 over the provider, model, prompt and the bytes of every PDF sent."""
+        digest = hashlib.sha256()
+        for part in (provider, model, prompt):
+            digest.update(part.encode('utf-8'))
+            digest.update(b"\0")
+        for path in [*pdf_paths, self.mapping_pdf_path or ""]:
+            if not path or not os.path.isfile(path):
+                digest.update(b"-")
+                continue
+            file_digest = hashlib.sha256()
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    file_digest.update(chunk)
+            digest.update(file_digest.digest())
+        return digest.hexdigest()
+
+    def _load_cached_response(self, key: str) -> Optional[str]:
+        """Return a fresh cached response for key, or None."""
+        if not self.use_response_cache:
+            return None
+        cache_file = _LLM_CACHE_DIR / f"{key}.json"
+        try:
+            if time.time() - cache_file.stat().st_mtime > self.response_cache_ttl:
+                return None
+            response_text = _loads(cache_file.read_bytes())["response_text"]
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        logger.info(f"LLM response cache hit: {key[:12]}")
+        return response_text
+
+    def _store_cached_response(self, key: str, response_text: str):
+        """Write response_text to the cache; failures only cost a future round-trip."""
+        if not self.use_response_cache or not response_text:
+            return
+        cache_file = _LLM_CACHE_DIR / f"{key}.json"
+        try:
+            _LLM_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            tmp_file = cache_file.with_suffix(".tmp")
+            tmp_file.write_bytes(_dumps({"response_text": response_text}, indent=False))
+            os.replace(tmp_file, cache_file)
+        except OSError as e:
+            logger.warning(f"Could not write LLM response cache: {e}")
+
     def _parse_ai_response(self, response_text: str) -> Tuple[Dict[str, str], Dict[str, float]]:
         """Parses the JSON object from the AI's response with enhanced error handling and diagnostics."""
         try:
@@ -360,8 +799,15 @@ Return a single, clean JSON object containing the extracted data and confidence
             if json_text.count('{') != json_text.count('}'):
                 logger.warning(f"Unbalanced braces in JSON: {json_text.count('{')} opening vs {json_text.count('}')} closing")
             
-            # Try to parse the JSON
-            result = json.loads(json_text)
+            # Try to parse the JSON, then fall back to scanning for a complete object
+            try:
+                # orjson's key cache already dedupes repeated keys; the stdlib path interns them
+                result = orjson.loads(json_text) if orjson is not None else _RESPONSE_DECODER.decode(json_text)
+            except json.JSONDecodeError:
+                result = _find_response_object(response_text)
+                if result is None:
+                    raise
+                logger.info("Recovered JSON object from response with surrounding text")
             
             # Process the result
             extracted_data = result.get("extracted_data", {})
@@ -424,79 +870,248 @@ Return a single, clean JSON object containing the extracted data and confidence
                     return file.read()
             elif ext == '.json':
                 with open(file_path, 'r', encoding='utf-8', errors='replace') as file:
-                    return json.dumps(json.load(file), indent=2)
+                    return _dumps(_loads(file.read())).decode('utf-8')
             else:
                 # For PDFs or other types, extract text if possible
                 try:
-                    import PyPDF2
-                    with open(file_path, 'rb') as pdf_file:
-                        reader = PyPDF2.PdfReader(pdf_file)
-                        return "\n".join(page.extract_text() for page in reader.pages)
+                    return self._extract_pdf_text(file_path)
                 except Exception:
                     return f"[Unsupported file type: {ext}]"
         except Exception as e:
             logger.error(f"Error reading file {file_path}: {e}")
             return f"[Error reading file: {str(e)}]"
 
+    def _extract_pdf_text(self, file_path: str) -> str:
+        """Read page text until _PDF_TEXT_BUDGET characters are collected.
+
+        The prompt only keeps the first 8000 characters of extra context, so
+        pages past the budget are never parsed. PyMuPDF is tried first, then
+        pdfplumber, then PyPDF2.
+        """
+        buf = []
+        total = 0
+        if PYMUPDF_AVAILABLE:
+            # MuPDF's C text extractor is far faster than the pure-Python parsers
+            try:
+                with fitz.open(file_path) as doc:
+                    for page in doc:
+                        text = page.get_text("text")
+                        buf.append(text)
+                        total += len(text)
+                        if total >= _PDF_TEXT_BUDGET:
+                            break
+                return "\n".join(buf)
+            except Exception as e:
+                logger.warning(f"PyMuPDF text extraction failed for {file_path}, falling back: {e}")
+                buf.clear()
+                total = 0
+        if PDF_TEXT_AVAILABLE:
+            import pdfplumber
+            with pdfplumber.open(file_path) as pdf:
+                for page in pdf.pages:
+                    text = page.extract_text() or ""
+                    buf.append(text)
+                    total += len(text)
+                    if total >= _PDF_TEXT_BUDGET:
+                        break
+                    page.flush_cache()
+            return "\n".join(buf)
+        import PyPDF2
+        with open(file_path, 'rb') as pdf_file:
+            for page in PyPDF2.PdfReader(pdf_file).pages:
+                text = page.extract_text() or ""
+                buf.append(text)
+                total += len(text)
+                if total >= _PDF_TEXT_BUDGET:
+                    break
+        return "\n".join(buf)
+
     def _extract_from_image(self, image_path: str) -> str:
         if not OCR_AVAILABLE: return "OCR not available."
-        try: return pytesseract.image_to_string(Image.open(image_path))
+        try:
+            import pytesseract
+            try:
+                # A path goes straight to tesseract, which decodes the file itself;
+                # opening it with PIL first would decode it and then re-encode it
+                # to a temporary PNG for tesseract to decode again
+                return pytesseract.image_to_string(image_path)
+            except pytesseract.TesseractError:
+                # Formats leptonica can't read still go through PIL
+                from PIL import Image
+                return pytesseract.image_to_string(Image.open(image_path))
         except Exception as e: return f"OCR error: {str(e)}"
 
     def _extract_from_url(self, url: str) -> str:
         if not WEB_SCRAPING_AVAILABLE: return "Web scraping not available."
         try:
-            soup = BeautifulSoup(requests.get(url, timeout=30).content, 'html.parser')
+            import requests
+            with requests.get(url, stream=True, timeout=30) as response:
+                if LXML_AVAILABLE:
+                    return self._stream_html_text(response)
+                from bs4 import BeautifulSoup
+                soup = BeautifulSoup(response.content, 'html.parser')
             for script in soup(["script", "style"]): script.decompose()
             text = ' '.join(t.strip() for t in soup.get_text().split() if t.strip())
             return text
         except Exception as e: return f"Web scraping error: {str(e)}"
 
+    def _stream_html_text(self, response) -> str:
+        """Collect block text from a streamed HTML response until _URL_TEXT_BUDGET."""
+        from lxml import etree
+        response.raw.decode_content = True  # undo gzip/deflate transfer encoding
+        parts = []
+        total = 0
+        for _, element in etree.iterparse(response.raw, events=('end',), tag=_URL_TEXT_TAGS, html=True):
+            text = ' '.join(''.join(element.itertext()).split())
+            # Clearing drops the subtree, so enclosing blocks don't repeat this text
+            element.clear()
+            if text:
+                parts.append(text)
+                total += len(text) + 1
+                if total >= _URL_TEXT_BUDGET:
+                    break
+        return '\n'.join(parts)
+
     def _extract_with_patterns(self, text: str) -> Tuple[Dict[str, str], Dict[str, float]]:
         print("🔍 Using pattern matching extraction")
         extracted_data = {}
         confidence_scores = {}
-        patterns = {
-            'attorney_name': r'attorney.*?([A-Z][a-z]+ [A-Z][a-z]+)', 'petitioner_name': r'petitioner.*?([A-Z][a-z]+ [A-Z][a-z]+)',
-            'respondent_name': r'respondent.*?([A-Z][a-z]+ [A-Z][a-z]+)', 'case_number': r'case.*?number.*?([A-Z0-9]+)',
-            'court_county': r'county of\s+([A-Z\s]+)', 'student_loan': r'student.*?loan.*?\$?\s*([0-9,]+\.?[0-9]*)',
-            'credit_card': r'credit.*?card.*?\$?\s*([0-9,]+\.?[0-9]*)', 'total_debt': r'total.*?debt.*?\$?\s*([0-9,]+\.?[0-9]*)',
-            'phone': r'\((\d{3})\)\s*(\d{3})-(\d{4})', 'address': r'(\d+\s+[A-Za-z\s]+(Street|St|Avenue|Ave|Road|Rd|Drive|Dr))',
-        }
+        # Only the first match of a pattern is ever used and it does not depend on
+        # the field, so scan the text at most once per pattern and reuse the value.
+        pattern_values: Dict[str, Optional[str]] = {}
         for field in self.form_fields:
-            field_text = (field.name + " " + (field.alt_text or "")).lower()
-            for pattern_type, pattern in patterns.items():
-                if any(word in field_text for word in pattern_type.split('_')):
-                    matches = re.finditer(pattern, text, re.IGNORECASE)
-                    for match in matches:
-                        value = f"({match.group(1)}) {match.group(2)}-{match.group(3)}" if pattern_type == 'phone' else match.group(1).strip()
+            field_words = set(_PATTERN_KEYWORD_RE.findall((field.name + " " + (field.alt_text or "")).lower()))
+            if not field_words:
+                continue
+            for pattern_type, keywords, compiled in _PATTERNS:
+                if not field_words.isdisjoint(keywords):
+                    if pattern_type not in pattern_values:
+                        match = compiled.search(text)
+                        if match is None:
+                            pattern_values[pattern_type] = None
+                        elif pattern_type == 'phone':
+                            pattern_values[pattern_type] = f"({match.group(1)}) {match.group(2)}-{match.group(3)}"
+                        else:
+                            pattern_values[pattern_type] = match.group(1).strip()
+                    value = pattern_values[pattern_type]
+                    if value is not None:
                         extracted_data[field.name] = value
                         confidence_scores[field.name] = 0.80
-                        break
         return extracted_data, confidence_scores
 
 
 
-class PDFFieldExtractor(QThread):
-    """Thread for extracting PDF fields using pdftk"""
+class PDFFieldExtractorSignals(QObject):
+    """Signals for PDFFieldExtractor (QRunnable is not a QObject)"""
     fields_extracted = pyqtSignal(list)
     error_occurred = pyqtSignal(str)
     progress_updated = pyqtSignal(int)
 
+class PDFFieldExtractor(QRunnable):
+    """Pooled task for extracting PDF fields (PyMuPDF/pikepdf, falling back to pdftk)"""
+
     def __init__(self, pdf_path: str):
         super().__init__()
+        self.signals = PDFFieldExtractorSignals()
         self.pdf_path = pdf_path
 
+    # PyMuPDF widget types -> pdftk FieldType names used throughout the app
+    _PYMUPDF_FIELD_TYPES = {
+        "CheckBox": "Button", "RadioButton": "Button", "Button": "Button",
+        "ComboBox": "Choice", "ListBox": "Choice",
+        "Text": "Text", "Signature": "Signature",
+    }
+
+    # path -> {"mtime_ns", "size", "fields"}; shared by all extractor threads
+    _fields_cache: Optional[Dict[str, Dict[str, Any]]] = None
+    _fields_cache_lock = threading.Lock()
+
+    @staticmethod
+    def _file_signature(pdf_path: str) -> Tuple[str, int, int]:
+        st = os.stat(pdf_path)
+        return os.path.abspath(pdf_path), st.st_mtime_ns, st.st_size
+
+    @classmethod
+    def _cached_fields(cls, pdf_path: str) -> Optional[List[FormField]]:
+        """Return fields extracted earlier from this exact file, or None."""
+        try:
+            path, mtime_ns, size = cls._file_signature(pdf_path)
+        except OSError:
+            return None
+        with cls._fields_cache_lock:
+            if cls._fields_cache is None:
+                try:
+                    cls._fields_cache = _loads(_FIELDS_CACHE_PATH.read_bytes())
+                except (OSError, ValueError):
+                    cls._fields_cache = {}
+            entry = cls._fields_cache.get(path)
+        if not entry or entry.get("mtime_ns") != mtime_ns or entry.get("size") != size:
+            return None
+        try:
+            return [FormField(**data) for data in entry["fields"]]
+        except (KeyError, TypeError):
+            return None
+
+    @classmethod
+    def _store_fields(cls, pdf_path: str, fields: List[FormField]):
+        """Remember fields for pdf_path in memory and in _FIELDS_CACHE_PATH."""
+        try:
+            path, mtime_ns, size = cls._file_signature(pdf_path)
+        except OSError:
+            return
+        with cls._fields_cache_lock:
+            cache = cls._fields_cache if cls._fields_cache is not None else {}
+            cache.pop(path, None)
+            cache[path] = {"mtime_ns": mtime_ns, "size": size, "fields": [asdict(f) for f in fields]}
+            # Oldest entries are first in insertion order
+            while len(cache) > _FIELDS_CACHE_LIMIT:
+                del cache[next(iter(cache))]
+            cls._fields_cache = cache
+            try:
+                _FIELDS_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = _FIELDS_CACHE_PATH.with_suffix(".tmp")
+                tmp_path.write_bytes(_dumps(cache, indent=False))
+                os.replace(tmp_path, _FIELDS_CACHE_PATH)
+            except OSError as e:
+                logger.warning(f"Could not write fields cache: {e}")
+
     def run(self):
         try:
-            self.progress_updated.emit(20)
+            self.signals.progress_updated.emit(20)
+
+            fields = self._cached_fields(self.pdf_path)
+            if fields is not None:
+                logger.info(f"Fields cache hit for {self.pdf_path} ({len(fields)} fields)")
+                self.signals.progress_updated.emit(100)
+                self.signals.fields_extracted.emit(fields)
+                return
+
+            if PYMUPDF_AVAILABLE:
+                try:
+                    fields = self._extract_with_pymupdf()
+                    self._store_fields(self.pdf_path, fields)
+                    self.signals.progress_updated.emit(100)
+                    self.signals.fields_extracted.emit(fields)
+                    return
+                except Exception as e:
+                    logger.warning(f"PyMuPDF field extraction failed, falling back to pdftk: {e}")
+
+            if USE_PIKEPDF:
+                try:
+                    fields = self._extract_with_pikepdf()
+                    self._store_fields(self.pdf_path, fields)
+                    self.signals.progress_updated.emit(100)
+                    self.signals.fields_extracted.emit(fields)
+                    return
+                except Exception as e:
+                    logger.warning(f"pikepdf field extraction failed, falling back to pdftk: {e}")
             
             # Check if pdftk is available
             try:
                 subprocess.run(['pdftk', '--version'], 
                               capture_output=True, check=True)
             except (subprocess.CalledProcessError, FileNotFoundError):
-                self.error_occurred.emit(
+                self.signals.error_occurred.emit(
                     "pdftk not found. Please install pdftk:\n"
                     "macOS: brew install pdftk-java\n"
                     "Ubuntu: sudo apt install pdftk\n"
@@ -504,156 +1119,347 @@ class PDFFieldExtractor(QThread):
                 )
                 return
 
-            self.progress_updated.emit(50)
+            self.signals.progress_updated.emit(50)
 
             # Extract fields using pdftk
             result = subprocess.run([
                 'pdftk', self.pdf_path, 'dump_data_fields'
-            ], capture_output=True, text=True, check=True)
+            ], capture_output=True, check=True)
 
-            self.progress_updated.emit(80)
+            self.signals.progress_updated.emit(80)
 
             # Parse the output
             fields = self._parse_pdftk_output(result.stdout)
+            self._store_fields(self.pdf_path, fields)
             
-            self.progress_updated.emit(100)
-            self.fields_extracted.emit(fields)
+            self.signals.progress_updated.emit(100)
+            self.signals.fields_extracted.emit(fields)
 
         except subprocess.CalledProcessError as e:
-            self.error_occurred.emit(f"Error extracting fields: {e}")
+            self.signals.error_occurred.emit(f"Error extracting fields: {e}")
         except Exception as e:
-            self.error_occurred.emit(f"Unexpected error: {str(e)}")
+            self.signals.error_occurred.emit(f"Unexpected error: {str(e)}")
 
-    def _parse_pdftk_output(self, output: str) -> List[FormField]:
-        """Parse pdftk dump_data_fields output"""
+    def _extract_with_pymupdf(self) -> List[FormField]:
+        """Read form fields in-process with PyMuPDF"""
+        fields = []
+        seen = set()
+        with fitz.open(self.pdf_path) as doc:
+            for page in doc:
+                for widget in page.widgets() or []:
+                    name = widget.field_name
+                    # Radio groups have one widget per option but are a single field
+                    if not name or name in seen:
+                        continue
+                    seen.add(name)
+                    type_name = widget.field_type_string
+                    if type_name in ("CheckBox", "RadioButton"):
+                        states = widget.button_states() or {}
+                        state_options = list(dict.fromkeys(states.get("normal") or []))
+                    else:
+                        state_options = list(widget.choice_values or [])
+                    fields.append(FormField(
+                        name=name,
+                        type=self._PYMUPDF_FIELD_TYPES.get(type_name, "Text"),
+                        alt_text=widget.field_label or '',
+                        flags=widget.field_flags or 0,
+                        justification='Left',
+                        state_options=state_options
+                    ))
+        return fields
+
+    def _extract_with_pikepdf(self) -> List[FormField]:
+        """Read form fields in-process with pikepdf, mirroring pdftk's dump_data_fields"""
+        fields = []
+        with pikepdf.open(self.pdf_path) as pdf:
+            acroform = pdf.Root.get("/AcroForm")
+            if acroform is None:
+                return fields
+            for name, field, widgets, attrs in _iter_pikepdf_fields(acroform.get("/Fields", [])):
+                field_type = _PIKEPDF_FIELD_TYPES.get(str(attrs.get("/FT", "/Tx")), "Text")
+                if field_type == "Button":
+                    states = {}
+                    for widget in widgets:
+                        normal = _normal_appearance_states(widget)
+                        if normal is not None:
+                            states.update(dict.fromkeys(str(key)[1:] for key in normal.keys()))
+                    state_options = list(states)
+                elif "/Opt" in field:
+                    # Options are either strings or [export value, display text] pairs
+                    state_options = [str(opt[0]) if isinstance(opt, pikepdf.Array) else str(opt)
+                                     for opt in field.Opt]
+                else:
+                    state_options = []
+                q = int(attrs.get("/Q", 0))
+                fields.append(FormField(
+                    name=name,
+                    type=field_type,
+                    alt_text=str(field.get("/TU", "")),
+                    flags=int(attrs.get("/Ff", 0)),
+                    justification=_JUSTIFICATIONS[q] if 0 <= q < len(_JUSTIFICATIONS) else 'Left',
+                    state_options=state_options
+                ))
+        return fields
+
+    def _parse_pdftk_output(self, output: bytes) -> List[FormField]:
+        """Parse pdftk dump_data_fields output
+
+        Works on the raw bytes from pdftk; only the values that end up in a
+        FormField are decoded, instead of decoding the whole dump up front.
+        """
         fields = []
         current_field = {}
-        
-        for line in output.strip().split('\n'):
-            if line.startswith('---'):
+
+        def text(key: bytes, default: str) -> str:
+            value = current_field.get(key)
+            return default if value is None else value.decode('utf-8', 'replace')
+
+        def finish_field():
+            fields.append(FormField(
+                name=text(b'FieldName', ''),
+                type=text(b'FieldType', 'Text'),
+                alt_text=text(b'FieldNameAlt', ''),
+                flags=int(current_field.get(b'FieldFlags', 0)),
+                justification=text(b'FieldJustification', 'Left'),
+                state_options=[value.decode('utf-8', 'replace')
+                               for value in current_field.get(b'FieldStateOption', ())]
+            ))
+
+        for line in output.splitlines():
+            if line.startswith(b'---'):
                 if current_field:
-                    field = FormField(
-                        name=current_field.get('FieldName', ''),
-                        field_type=current_field.get('FieldType', 'Text'),
-                        alt_text=current_field.get('FieldNameAlt', ''),
-                        flags=int(current_field.get('FieldFlags', 0)),
-                        justification=current_field.get('FieldJustification', 'Left'),
-                        state_options=current_field.get('FieldStateOption', [])
-                    )
-                    fields.append(field)
-                current_field = {}
-            elif ':' in line:
-                key, value = line.split(':', 1)
-                key = key.strip()
-                value = value.strip()
-                
-                if key == 'FieldStateOption':
-                    if key not in current_field:
-                        current_field[key] = []
-                    current_field[key].append(value)
-                else:
-                    current_field[key] = value
+                    finish_field()
+                    current_field = {}
+                continue
+            key, sep, value = line.partition(b':')
+            if not sep:
+                continue
+            key = key.strip()
+            value = value.strip()
+            if key == b'FieldStateOption':
+                current_field.setdefault(key, []).append(value)
+            else:
+                current_field[key] = value
 
         # Add the last field
         if current_field:
-            field = FormField(
-                name=current_field.get('FieldName', ''),
-                field_type=current_field.get('FieldType', 'Text'),
-                alt_text=current_field.get('FieldNameAlt', ''),
-                flags=int(current_field.get('FieldFlags', 0)),
-                justification=current_field.get('FieldJustification', 'Left'),
-                state_options=current_field.get('FieldStateOption', [])
-            )
-            fields.append(field)
+            finish_field()
 
         return fields
 
-class PDFFormFiller(QThread):
-    """Thread for filling PDF forms"""
+# One C-level pass escapes FDF string delimiters instead of chained replace()
+_FDF_ESCAPE_MAP = str.maketrans({'\\': '\\\\', '(': '\\(', ')': '\\)'})
+_FDF_HEADER = b"%FDF-1.2\n1 0 obj\n<<\n/FDF\n<<\n/Fields [\n"
+_FDF_FOOTER = b"]\n>>\n>>\nendobj\ntrailer\n\n<<\n/Root 1 0 R\n>>\n%%EOF"
+
+class PDFFormFillerSignals(QObject):
+    """Signals for PDFFormFiller (QRunnable is not a QObject)"""
     form_filled = pyqtSignal(str)
     error_occurred = pyqtSignal(str)
     progress_updated = pyqtSignal(int)
 
+class PDFFormFiller(QRunnable):
+    """Pooled task for filling PDF forms"""
+
     def __init__(self, pdf_path: str, field_data: Dict[str, str], output_path: str):
         super().__init__()
+        self.signals = PDFFormFillerSignals()
         self.pdf_path = pdf_path
         self.field_data = field_data
         self.output_path = output_path
 
     def run(self):
         try:
-            self.progress_updated.emit(20)
+            self.signals.progress_updated.emit(20)
 
-            # Create FDF file
-            fdf_content = self._create_fdf(self.field_data)
-            
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.fdf', delete=False) as fdf_file:
-                fdf_file.write(fdf_content)
-                fdf_path = fdf_file.name
+            if USE_PIKEPDF:
+                try:
+                    self._fill_with_pikepdf(self.pdf_path, self.field_data, self.output_path)
+                    self.signals.progress_updated.emit(100)
+                    self.signals.form_filled.emit(self.output_path)
+                    return
+                except Exception as e:
+                    logger.warning(f"pikepdf fill failed, falling back to pdftk: {e}")
 
-            self.progress_updated.emit(50)
+            # Create FDF content
+            fdf_content = self._create_fdf(self.field_data)
 
-            try:
-                # Fill the form using pdftk
-                subprocess.run([
-                    'pdftk', self.pdf_path, 'fill_form', fdf_path,
-                    'output', self.output_path
-                ], check=True)
+            self.signals.progress_updated.emit(50)
 
-                self.progress_updated.emit(100)
-                self.form_filled.emit(self.output_path)
+            # Fill the form using pdftk; the FDF is piped in on stdin ('-'),
+            # so nothing is written to or cleaned up from the temp directory
+            subprocess.run([
+                'pdftk', self.pdf_path, 'fill_form', '-',
+                'output', self.output_path
+            ], input=fdf_content, check=True)
 
-            finally:
-                # Clean up temporary FDF file
-                os.unlink(fdf_path)
+            self.signals.progress_updated.emit(100)
+            self.signals.form_filled.emit(self.output_path)
 
         except Exception as e:
-            self.error_occurred.emit(f"Error filling form: {str(e)}")
-
-    def _create_fdf(self, field_data: Dict[str, str]) -> str:
+            self.signals.error_occurred.emit(f"Error filling form: {str(e)}")
+
+    @staticmethod
+    def _button_state(value: str, widgets) -> Any:
+        """Map a field value onto one of the button's own appearance states.
+
+        A value naming a state (e.g. a radio option) selects it; otherwise
+        off-like values uncheck and anything else picks the first on-state.
+        """
+        requested = pikepdf.Name("/" + value.lstrip("/"))
+        on_states = []
+        for widget in widgets:
+            normal = _normal_appearance_states(widget)
+            if normal is None:
+                continue
+            if requested in normal:
+                return requested
+            on_states.extend(key for key in normal.keys() if key != "/Off")
+        if value.lower() in _BUTTON_OFF_VALUES or not on_states:
+            return pikepdf.Name.Off
+        return pikepdf.Name(on_states[0])
+
+    @staticmethod
+    def _fill_with_pikepdf(pdf_path: str, field_data: Dict[str, str], output_path: str):
+        """Set /V on each named field in-process and regenerate their appearances"""
+        with pikepdf.open(pdf_path, allow_overwriting_input=True) as pdf:
+            acroform = pdf.Root.AcroForm
+            for name, field, widgets, attrs in _iter_pikepdf_fields(acroform.get("/Fields", [])):
+                value = field_data.get(name)
+                if not value:
+                    continue
+                if str(attrs.get("/FT", "/Tx")) == "/Btn":
+                    state = PDFFormFiller._button_state(value, widgets)
+                    field.V = state
+                    for widget in widgets:
+                        normal = _normal_appearance_states(widget)
+                        widget.AS = state if normal is not None and state in normal else pikepdf.Name.Off
+                else:
+                    field.V = pikepdf.String(value)
+            # Draw the new values into /AP like pdftk does; viewers that ignore
+            # NeedAppearances would otherwise show the old (empty) appearances
+            acroform.NeedAppearances = True
+            pdf.generate_appearance_streams()
+            pdf.save(output_path)
+
+    @staticmethod
+    def _create_fdf(field_data: Dict[str, str]) -> bytes:
         """Create FDF content for form filling"""
-        fdf_header = """%FDF-1.2
-1 0 obj
-<<
-/FDF
-<<
-/Fields ["""
-
-        fdf_fields = []
+        out = bytearray(_FDF_HEADER)
         for field_name, field_value in field_data.items():
             if field_value:  # Only include non-empty fields
-                escaped_value = field_value.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
-                fdf_fields.append(f"""<<
-/T ({field_name})
-/V ({escaped_value})
->>""")
+                out += f"<<\n/T ({field_name})\n/V ({field_value.translate(_FDF_ESCAPE_MAP)})\n>>\n".encode('utf-8')
+        out += _FDF_FOOTER
+        return bytes(out)
+
+class JsonIOSignals(QObject):
+    """Signals for JsonIOWorker (QRunnable is not a QObject)"""
+    loaded = pyqtSignal(str, object)  # path, data
+    saved = pyqtSignal(str)  # path
+    error = pyqtSignal(str)
 
-        fdf_footer = """]
->>
->>
-endobj
-trailer
+# Mapping files larger than this are parsed incrementally when ijson is installed
+_STREAM_JSON_THRESHOLD = 1024 * 1024
 
-<<
-/Root 1 0 R
->>
-%%EOF"""
+class JsonIOWorker(QRunnable):
+    """Reads or writes a JSON file on the global thread pool. Never touches widgets."""
 
-        return fdf_header + '\n' + '\n'.join(fdf_fields) + '\n' + fdf_footer
+    def __init__(self, path: str, mode: str, data: Dict = None):
+        super().__init__()
+        self.path = path
+        self.mode = mode  # 'load' or 'save'
+        self.data = data
+        self.signals = JsonIOSignals()
+
+    def run(self):
+        try:
+            if self.mode == 'load':
+                with open(self.path, 'rb') as f:
+                    if IJSON_AVAILABLE and os.fstat(f.fileno()).st_size > _STREAM_JSON_THRESHOLD:
+                        import ijson
+                        # Stream top-level pairs instead of buffering the whole file;
+                        # use_float keeps numbers as json.load returns them (not Decimal)
+                        data = dict(ijson.kvitems(f, '', use_float=True))
+                    else:
+                        data = _loads(f.read())
+                self.signals.loaded.emit(self.path, data)
+            else:
+                with open(self.path, 'wb') as f:
+                    f.write(_dumps(self.data))
+                self.signals.saved.emit(self.path)
+        except Exception as e:
+            self.signals.error.emit(f"Failed to {self.mode} mapping: {str(e)}")
+
+class RecentFilesComboBox(QComboBox):
+    """Combo box that announces when its list is about to open"""
+    popup_about_to_show = pyqtSignal()
+    
+    def showPopup(self):
+        self.popup_about_to_show.emit()
+        super().showPopup()
 
 class MainWindow(QMainWindow):
     """Main application window"""
+    ai_job_requested = pyqtSignal(object)  # job dict for the persistent AI worker
     
     def __init__(self):
         super().__init__()
+        # Field extraction, form filling and JSON I/O all run as QRunnables on
+        # the global pool; keep it at one thread per core, and keep idle threads
+        # alive (the default expiry is 30s) so a later extract/fill doesn't pay
+        # for a fresh OS thread
+        pool = QThreadPool.globalInstance()
+        pool.setMaxThreadCount(QThread.idealThreadCount())
+        pool.setExpiryTimeout(-1)
         self.current_pdf_path = ""
         self.settings = QSettings("PDFFormFiller", "FormMappings")
         self.form_fields = []
+        self._field_names: List[str] = []
+        self._field_names_lower: List[str] = []
+        self._field_trigrams: Dict[str, set] = {}
+        self._short_field_indices: List[int] = []
         self.ai_data_sources = []
+        self._ai_data_sources_seen = set()  # (type, content) keys of ai_data_sources
+        self._exists_cache: Dict[str, Tuple[float, bool]] = {}  # path -> (checked_at, exists)
         self.paths_history = {}  # Store recently used file paths
+        self._paths_history_hash = 0  # hash of the last serialized history on disk
         self.load_paths_history()  # Load previously saved paths
+        # (basename, path) display entries for existing recent PDFs/maps, so the
+        # combos can be refilled without stat() or path splitting
+        self._recent_entries: Dict[str, List[Tuple[str, str]]] = {}
+        self._refresh_recent_entries()
+        # Coalesce history writes; _flush_history does the actual disk I/O
+        self._history_dirty = False
+        self._history_flush_timer = QTimer(self)
+        self._history_flush_timer.setSingleShot(True)
+        self._history_flush_timer.timeout.connect(self._flush_history)
         self.init_ui()
         self.apply_theme()
+        self._start_ai_worker()
+
+    def _start_ai_worker(self):
+        """Create the AI extraction worker once and park it on its own thread."""
+        self._ai_thread = QThread(self)
+        self._ai_worker = AIDataExtractor()
+        self._ai_worker.moveToThread(self._ai_thread)
+        self._ai_worker.data_extracted.connect(self.on_ai_data_extracted)
+        self._ai_worker.error_occurred.connect(self.on_ai_extraction_error)
+        self._ai_worker.progress_updated.connect(self.on_ai_progress_updated)
+        self._ai_worker.show_message.connect(self.show_ai_message)
+        # Queued across threads, so extract() runs on the worker thread
+        self.ai_job_requested.connect(self._ai_worker.extract)
+        self._ai_thread.start()
+
+    def closeEvent(self, event):
+        """Stop the AI worker thread before the window goes away."""
+        if self._history_flush_timer.isActive():
+            self._history_flush_timer.stop()
+            self._flush_history()
+        self._ai_worker.cancel()
+        self._ai_thread.quit()
+        self._ai_thread.wait()
+        self._ai_worker.shutdown()
+        super().closeEvent(event)
 
     def init_ui(self):
         self.setWindowTitle("PDF Form Filler - Universal Fillable PDF Tool")
@@ -682,10 +1488,11 @@ class MainWindow(QMainWindow):
         # Recent PDFs dropdown
         recent_files_layout = QHBoxLayout()
         recent_files_layout.addWidget(QLabel("Recent PDFs:"))
-        self.recent_pdfs_combo = QComboBox()
+        self.recent_pdfs_combo = RecentFilesComboBox()
         self.recent_pdfs_combo.setMinimumWidth(300)
         self.populate_recent_pdfs_combo()
         self.recent_pdfs_combo.currentIndexChanged.connect(self.load_selected_pdf)
+        self.recent_pdfs_combo.popup_about_to_show.connect(self._validate_recent_entries)
         recent_files_layout.addWidget(self.recent_pdfs_combo)
         
         # Save/Load paths buttons
@@ -708,10 +1515,11 @@ class MainWindow(QMainWindow):
         mapping_file_layout.addWidget(self.browse_mapping_pdf_btn)
         
         # Recent mapping PDFs dropdown
-        self.recent_maps_combo = QComboBox()
+        self.recent_maps_combo = RecentFilesComboBox()
         self.recent_maps_combo.setMinimumWidth(150)
         self.populate_recent_maps_combo()
         self.recent_maps_combo.currentIndexChanged.connect(self.load_selected_map)
+        self.recent_maps_combo.popup_about_to_show.connect(self._validate_recent_entries)
         mapping_file_layout.addWidget(self.recent_maps_combo)
 
         layout.addLayout(mapping_file_layout)
@@ -729,11 +1537,12 @@ class MainWindow(QMainWindow):
         self.field_mapping_widget = FieldMappingWidget()
         self.tab_widget.addTab(self.field_mapping_widget, "Field Mapping")
 
-        # AI extraction tab
-        self.create_ai_extraction_tab()
-
-        # Data management tab
-        self.create_data_management_tab()
+        # The AI extraction and data management tabs are built the first time
+        # they are shown; until then each is an empty page
+        self._lazy_tabs: Dict[QWidget, Callable[[], QWidget]] = {}
+        self._add_lazy_tab(self.create_ai_extraction_tab, "AI Data Extraction")
+        self._add_lazy_tab(self.create_data_management_tab, "Data Management")
+        self.tab_widget.currentChanged.connect(self._build_lazy_tab)
 
         # Action buttons
         button_layout = QHBoxLayout()
@@ -759,24 +1568,38 @@ class MainWindow(QMainWindow):
         self.status_label = QLabel("Ready - Select a PDF file to begin")
         layout.addWidget(self.status_label)
 
+    def _add_lazy_tab(self, builder: Callable[[], QWidget], label: str):
+        """Add an empty page whose contents builder() creates on first activation"""
+        page = QWidget()
+        page_layout = QVBoxLayout(page)
+        page_layout.setContentsMargins(0, 0, 0, 0)
+        self._lazy_tabs[page] = builder
+        self.tab_widget.addTab(page, label)
+
+    def _build_lazy_tab(self, index: int):
+        """Fill a lazily added tab the first time it becomes current"""
+        page = self.tab_widget.widget(index)
+        builder = self._lazy_tabs.pop(page, None)
+        if builder is not None:
+            page.layout().addWidget(builder())
+        if not self._lazy_tabs:
+            self.tab_widget.currentChanged.disconnect(self._build_lazy_tab)
+
     def browse_mapping_pdf(self):
         """Browse for the numbered mapping PDF file."""
         file_path, _ = QFileDialog.getOpenFileName(
-            self, "Select Numbered Mapping PDF", "", "PDF Files (*.pdf)"
+            self, "Select Numbered Mapping PDF", "", _PDF_FILTER
         )
         if file_path:
             self.mapping_pdf_path_edit.setText(file_path)
             self.status_label.setText("Numbered mapping PDF loaded.")
             
             # Add to recent maps
-            if file_path not in self.paths_history.get("recent_maps", []):
-                if "recent_maps" not in self.paths_history:
-                    self.paths_history["recent_maps"] = []
-                self.paths_history["recent_maps"].insert(0, file_path)
-                self.paths_history["recent_maps"] = self.paths_history["recent_maps"][:10]
-                self.populate_recent_maps_combo()
+            self._push_recent("recent_maps", file_path)
+            self._refresh_recent_entries("recent_maps")
+            self.populate_recent_maps_combo()
     
-    def create_ai_extraction_tab(self):
+    def create_ai_extraction_tab(self) -> QWidget:
         """Create AI extraction tab with improved error handling"""
         ai_tab = QWidget()
         ai_layout = QVBoxLayout(ai_tab)
@@ -800,6 +1623,12 @@ class MainWindow(QMainWindow):
         model_layout.addWidget(QLabel("Model:"))
         self.ai_model_combo = QComboBox()
         self.ai_model_combo.addItems(["Default Model"])
+        # One model per provider, built once and swapped in by _update_ai_model_list;
+        # parented to the window because the combo deletes models it owns on swap
+        self._ai_model_lists = {
+            provider: QStringListModel(models, self)
+            for provider, models in _AI_MODEL_NAMES.items()
+        }
         model_layout.addWidget(self.ai_model_combo)
         provider_layout.addLayout(model_layout)
         
@@ -811,6 +1640,12 @@ class MainWindow(QMainWindow):
         self.api_key_edit.setPlaceholderText("Enter API key (only needed for OpenAI/Claude)")
         key_layout.addWidget(self.api_key_edit)
         provider_layout.addLayout(key_layout)
+
+        # Reuse responses for identical requests (same sources, prompt and model)
+        self.ai_cache_check = QCheckBox("Reuse cached AI responses for identical requests")
+        self.ai_cache_check.setChecked(self.settings.value("ai/use_response_cache", True, type=bool))
+        self.ai_cache_check.toggled.connect(lambda checked: self.settings.setValue("ai/use_response_cache", checked))
+        provider_layout.addWidget(self.ai_cache_check)
         
         # Connect radio buttons to update model list
         self.ai_provider_radio_pattern.toggled.connect(self._update_ai_model_list)
@@ -900,7 +1735,8 @@ class MainWindow(QMainWindow):
         results_group = QGroupBox("Extraction Results")
         results_layout = QVBoxLayout()
         
-        self.ai_results = QTextEdit()
+        # Plain-text widget: no rich-text layout for large extraction reports
+        self.ai_results = QPlainTextEdit()
         self.ai_results.setReadOnly(True)
         self.ai_results.setPlaceholderText("Results will appear here...")
         results_layout.addWidget(self.ai_results)
@@ -908,10 +1744,9 @@ class MainWindow(QMainWindow):
         results_group.setLayout(results_layout)
         ai_layout.addWidget(results_group)
         
-        # Add to tabs
-        self.tab_widget.addTab(ai_tab, "AI Data Extraction")
+        return ai_tab
 
-    def create_data_management_tab(self):
+    def create_data_management_tab(self) -> QWidget:
         """Create the data management tab"""
         data_widget = QWidget()
         layout = QVBoxLayout()
@@ -945,67 +1780,26 @@ class MainWindow(QMainWindow):
         layout.addWidget(group)
         
         data_widget.setLayout(layout)
-        self.tab_widget.addTab(data_widget, "Data Management")
+        return data_widget
 
     def apply_theme(self):
         """Apply a modern theme to the application"""
-        self.setStyleSheet("""
-            QMainWindow {
-                background-color: #f5f5f5;
-            }
-            QPushButton {
-                background-color: #2196F3;
-                color: white;
-                border: none;
-                padding: 8px 16px;
-                border-radius: 4px;
-                font-weight: bold;
-            }
-            QPushButton:hover {
-                background-color: #1976D2;
-            }
-            QPushButton:disabled {
-                background-color: #cccccc;
-            }
-            QGroupBox {
-                font-weight: bold;
-                border: 2px solid #cccccc;
-                border-radius: 5px;
-                margin: 10px 0px;
-                padding-top: 10px;
-            }
-            QGroupBox::title {
-                subcontrol-origin: margin;
-                left: 10px;
-                padding: 0 5px 0 5px;
-            }
-            QLineEdit {
-                border: 1px solid #ddd;
-                border-radius: 4px;
-                padding: 6px;
-            }
-            QLineEdit:focus {
-                border-color: #2196F3;
-            }
-            QTabWidget::pane {
-                border: 1px solid #cccccc;
-            }
-            QTabBar::tab {
-                background-color: #e0e0e0;
-                padding: 8px 16px;
-                margin-right: 2px;
-            }
-            QTabBar::tab:selected {
-                background-color: #2196F3;
-                color: white;
-            }
-        """)
+        if getattr(self, '_theme_applied', False):
+            return
+        # main() installs the theme once on the QApplication; only fall back to a
+        # window-level sheet when the window is hosted by another application
+        app = QApplication.instance()
+        if app is None or app.styleSheet() != _THEME_QSS:
+            self.setStyleSheet(_THEME_QSS)
+        # Tab styles only concern the tab widget, so keep their polish scope there
+        self.tab_widget.setStyleSheet(_TAB_QSS)
+        self._theme_applied = True
 
     def browse_pdf(self):
         """Browse for PDF file"""
         print("DEBUG: Browse PDF button clicked")
         file_path, _ = QFileDialog.getOpenFileName(
-            self, "Select PDF File", "", "PDF Files (*.pdf)"
+            self, "Select PDF File", "", _PDF_FILTER
         )
         
         if file_path:
@@ -1014,12 +1808,9 @@ class MainWindow(QMainWindow):
             self.file_path_edit.setText(file_path)
             
             # Add to recent PDFs
-            if file_path not in self.paths_history.get("recent_pdfs", []):
-                if "recent_pdfs" not in self.paths_history:
-                    self.paths_history["recent_pdfs"] = []
-                self.paths_history["recent_pdfs"].insert(0, file_path)
-                self.paths_history["recent_pdfs"] = self.paths_history["recent_pdfs"][:10]
-                self.populate_recent_pdfs_combo()
+            self._push_recent("recent_pdfs", file_path)
+            self._refresh_recent_entries("recent_pdfs")
+            self.populate_recent_pdfs_combo()
                 
             self.extract_fields()
         else:
@@ -1034,21 +1825,33 @@ class MainWindow(QMainWindow):
         self.progress_bar.setValue(0)
         self.status_label.setText("Extracting form fields...")
         
-        self.extractor_thread = PDFFieldExtractor(self.current_pdf_path)
-        self.extractor_thread.fields_extracted.connect(self.on_fields_extracted)
-        self.extractor_thread.error_occurred.connect(self.on_extraction_error)
-        self.extractor_thread.progress_updated.connect(self.progress_bar.setValue)
-        self.extractor_thread.start()
+        extractor = PDFFieldExtractor(self.current_pdf_path)
+        extractor.signals.fields_extracted.connect(self.on_fields_extracted)
+        extractor.signals.error_occurred.connect(self.on_extraction_error)
+        extractor.signals.progress_updated.connect(self.progress_bar.setValue)
+        QThreadPool.globalInstance().start(extractor)
 
     def on_fields_extracted(self, fields: List[FormField]):
         """Handle successful field extraction and create number maps."""
         self.progress_bar.setVisible(False)
+        # Intern names: they are dict keys in every map and lookup below
+        for f in fields:
+            f.name = sys.intern(f.name)
         self.field_mapping_widget.set_fields(fields)
         self.form_fields = fields
+        # Flat name lists so lookups in on_ai_data_extracted avoid FormField attribute access
+        self._field_names = [f.name for f in fields]
+        self._field_names_lower = [n.lower() for n in self._field_names]
+        # Trigram index used to prefilter fuzzy substring matching
+        self._field_trigrams, self._short_field_indices = _build_trigram_index(self._field_names_lower)
 
         # --- ADD THIS LOGIC to create the maps ---
-        self.fieldname_to_number_map = {field.name: i + 1 for i, field in enumerate(self.form_fields)}
-        self.number_to_fieldname_map = {i + 1: field.name for i, field in enumerate(self.form_fields)}
+        # Both maps in one pass; fresh dicts, since AIDataExtractor keys its prompt cache on identity
+        self.fieldname_to_number_map = fieldname_to_number = {}
+        self.number_to_fieldname_map = number_to_fieldname = {}
+        for number, name in enumerate(self._field_names, 1):
+            fieldname_to_number[name] = number
+            number_to_fieldname[number] = name
         logger.info(f"Created number map for {len(fields)} fields.")
         self.fill_form_btn.setEnabled(True)
         self.status_label.setText(f"Ready - Found {len(fields)} form fields")
@@ -1060,18 +1863,47 @@ class MainWindow(QMainWindow):
         QMessageBox.critical(self, "Error", error_message)
 
     # AI Data Source Management Methods
+    def _add_ai_data_source(self, source_type: str, content: str,
+                            display_name: Optional[str] = None) -> bool:
+        """Append a data source unless it is already queued; returns True if added.
+
+        Entries are (type, content, display_name); the name defaults to the
+        first 50 characters of content and is what the AI worker reports.
+        """
+        key = (source_type, content)
+        if key in self._ai_data_sources_seen:
+            logger.info(f"Skipping duplicate {source_type} source: {content[:50]}")
+            return False
+        self._ai_data_sources_seen.add(key)
+        if display_name is None:
+            display_name = content[:50]
+        self.ai_data_sources.append((source_type, content, display_name))
+        return True
+
+    def _add_source_items(self, items: List[str]):
+        """Append several entries to sources_list in one layout pass."""
+        if not items:
+            return
+        self.sources_list.setUpdatesEnabled(False)
+        try:
+            self.sources_list.addItems(items)
+        finally:
+            self.sources_list.setUpdatesEnabled(True)
+
     def add_ai_file_source(self):
         """Add a file as data source for AI analysis"""
         try:
             file_path, _ = QFileDialog.getOpenFileName(
                 self, "Select Data File", "",
-                "All Supported (*.pdf *.txt *.json *.csv *.md);;PDF Files (*.pdf);;Text Files (*.txt);;JSON Files (*.json);;CSV Files (*.csv)"
+                _DATA_FILTER
             )
             
             if file_path:
                 file_name = os.path.basename(file_path)
+                if not self._add_ai_data_source('file', str(file_path), file_name):
+                    self.status_label.setText(f"{file_name} is already a data source")
+                    return
                 self.sources_list.addItem(f"File: {file_name}")
-                self.ai_data_sources.append(('file', str(file_path)))
                 print(f"Added file source: {file_name}")
                 
                 # Add to recent data sources if it's a file
@@ -1097,17 +1929,28 @@ class MainWindow(QMainWindow):
     def add_ai_text_source(self):
         """Add text input as data source for AI analysis"""
         try:
-            text = self.ai_text_input.toPlainText().strip()
-            if text:
-                self.sources_list.addItem(f"Text: {len(text)} chars")
-                
+            # Locate the stripped text in the document and copy out at most
+            # max_len characters, so a huge paste is never materialized as a
+            # Python string just to be truncated
+            doc = self.ai_text_input.document()
+            first = doc.find(_NON_SPACE_RE, 0)
+            if not first.isNull():
+                last = doc.find(_NON_SPACE_RE, doc.characterCount(),
+                                QTextDocument.FindFlag.FindBackward)
+                start, end = first.selectionStart(), last.selectionEnd()
+                length = end - start
                 # Truncate very long text to avoid memory issues
                 max_len = 5000
-                if len(text) > max_len:
-                    truncated = text[:max_len] + "... (truncated)"
-                    self.ai_data_sources.append(('text', truncated))
-                else:
-                    self.ai_data_sources.append(('text', text))
+                cursor = QTextCursor(doc)
+                cursor.setPosition(start)
+                cursor.setPosition(min(end, start + max_len), QTextCursor.MoveMode.KeepAnchor)
+                # selectedText() separates paragraphs with U+2029
+                text = cursor.selectedText().replace("\u2029", "\n")
+                if length > max_len:
+                    text += "... (truncated)"
+                added = self._add_ai_data_source('text', text)
+                if added:
+                    self.sources_list.addItem(f"Text: {length} chars")
                     
                 self.ai_text_input.clear()
                 print("Added text source")
@@ -1125,9 +1968,10 @@ class MainWindow(QMainWindow):
             )
             
             if ok and url:
+                if not self._add_ai_data_source('url', url):
+                    return
                 display_url = url[:50] + "..." if len(url) > 50 else url
                 self.sources_list.addItem(f"URL: {display_url}")
-                self.ai_data_sources.append(('url', url))
                 print(f"Added URL source: {url}")
         except Exception as e:
             print(f"Error adding URL source: {e}")
@@ -1145,13 +1989,15 @@ class MainWindow(QMainWindow):
             
             file_path, _ = QFileDialog.getOpenFileName(
                 self, "Select Image File", "",
-                "Image Files (*.png *.jpg *.jpeg *.tiff *.bmp *.gif)"
+                _IMAGE_FILTER
             )
             
             if file_path:
                 file_name = os.path.basename(file_path)
+                if not self._add_ai_data_source('image', str(file_path)):
+                    self.status_label.setText(f"{file_name} is already a data source")
+                    return
                 self.sources_list.addItem(f"Image: {file_name}")
-                self.ai_data_sources.append(('image', str(file_path)))
                 print(f"Added image source: {file_name}")
         except Exception as e:
             print(f"Error adding image source: {e}")
@@ -1161,6 +2007,7 @@ class MainWindow(QMainWindow):
         try:
             self.sources_list.clear()
             self.ai_data_sources = []
+            self._ai_data_sources_seen.clear()
             print("AI sources cleared")
         except Exception as e:
             print(f"Error clearing sources: {e}")
@@ -1168,29 +2015,15 @@ class MainWindow(QMainWindow):
     def _update_ai_model_list(self):
         """Update the model list based on selected provider"""
         try:
-            self.ai_model_combo.clear()
-            
             if self.ai_provider_radio_openai.isChecked():
-                openai_models = [
-                    "gpt-4o",
-                    "gpt-4-turbo",
-                    "gpt-4",
-                    "gpt-3.5-turbo"
-                ]
-                self.ai_model_combo.addItems(openai_models)
-                
+                model = self._ai_model_lists["openai"]
             elif self.ai_provider_radio_anthropic.isChecked():
-                claude_models = [
-                    "claude-3-5-sonnet-20240620",
-                    "claude-3-opus-20240229",
-                    "claude-3-sonnet-20240229",
-                    "claude-3-haiku-20240307"
-                ]
-                self.ai_model_combo.addItems(claude_models)
-                
+                model = self._ai_model_lists["anthropic"]
             else:
-                # Pattern matching has no model selection
-                self.ai_model_combo.addItem("Pattern Matching (No Model)")
+                model = self._ai_model_lists["pattern"]
+            # toggled fires for both the old and the new radio button
+            if self.ai_model_combo.model() is not model:
+                self.ai_model_combo.setModel(model)
                 
         except Exception as e:
             print(f"Error updating model list: {e}")
@@ -1205,7 +2038,10 @@ class MainWindow(QMainWindow):
                 return
                 
             # Check if we have any data sources
-            has_text = bool(self.ai_text_input.toPlainText().strip())
+            # One copy of the editor buffer; isspace() avoids a second full copy
+            # from strip() when pasted text ends in a newline
+            text_content = self.ai_text_input.toPlainText()
+            has_text = bool(text_content) and not text_content.isspace()
             has_sources = bool(self.ai_data_sources)
             
             if not has_text and not has_sources:
@@ -1235,39 +2071,27 @@ class MainWindow(QMainWindow):
             self.ai_extract_btn.setEnabled(False)
             self.status_label.setText("Extracting data...")
             
-            # Create data sources
-            sources = []
-            
-            # Add text input as source
-            if has_text:
-                text_content = self.ai_text_input.toPlainText().strip()
-                sources.append(DataSource("Direct Text Input", "text", text_content))
-            
-            # Add file/URL/image sources
-            for source_type, source_content in self.ai_data_sources:
-                source_name = f"{source_type.title()}: {os.path.basename(source_content) if source_type == 'file' else source_content[:50]}"
-                sources.append(DataSource(source_name, source_type, source_content))
-            
             # Get selected model
             selected_model = self.ai_model_combo.currentText()
             api_key = self.api_key_edit.text().strip()
             mapping_pdf_path = self.mapping_pdf_path_edit.text().strip()
 
-            # Start extraction thread
-            self.extractor_thread = AIDataExtractor(
-                sources, self.form_fields, provider, api_key, selected_model,
-                mapping_pdf_path=mapping_pdf_path,  # Pass the new path
-                fieldname_to_number_map=self.fieldname_to_number_map # Pass the map
-            )
-            
-            # CRITICAL: Set the target form path for the AI extraction context
-            self.extractor_thread.target_form_path = self.current_pdf_path
+            # Queue the job on the persistent AI worker.
+            # DataSource objects are built inside the worker from the raw tuples
             logger.info(f"Setting target form path for AI extraction: {self.current_pdf_path}")
-            self.extractor_thread.data_extracted.connect(self.on_ai_data_extracted)
-            self.extractor_thread.error_occurred.connect(self.on_ai_extraction_error)
-            self.extractor_thread.progress_updated.connect(self.on_ai_progress_updated)
-            self.extractor_thread.show_message.connect(self.show_ai_message)
-            self.extractor_thread.start()
+            self.ai_job_requested.emit({
+                "raw_sources": list(self.ai_data_sources),
+                "form_fields": self.form_fields,
+                "ai_provider": provider,
+                "api_key": api_key,
+                "model": selected_model,
+                "mapping_pdf_path": mapping_pdf_path,  # Pass the new path
+                "fieldname_to_number_map": self.fieldname_to_number_map,  # Pass the map
+                "direct_text": text_content if has_text else "",
+                # CRITICAL: Set the target form path for the AI extraction context
+                "target_form_path": self.current_pdf_path,
+                "use_response_cache": self.ai_cache_check.isChecked(),
+            })
             
         except Exception as e:
             print(f"Error in extract_with_ai: {e}")
@@ -1296,6 +2120,11 @@ class MainWindow(QMainWindow):
             
             logger.debug(f"Data structure {'has' if has_nested_values else 'does not have'} nested values")
             
+            field_names = self._field_names
+            field_names_lower = self._field_names_lower
+            field_name_set = set(field_names)
+            number_to_fieldname = self.number_to_fieldname_map
+            
             # Process all data points
             for key, value in extracted_data.items():
                 # Handle nested structure from new prompt (data format with debug_description)
@@ -1305,21 +2134,23 @@ class MainWindow(QMainWindow):
                 else:
                     actual_value = value
                 
-                try:
-                    # Try to convert key to integer (numbered field)
+                if isinstance(key, int) or (isinstance(key, str) and
+                        (key.isdecimal() or (key[:1] == '-' and key[1:].isdecimal()))):
+                    # Numbered field key
                     field_number = int(key)
                     number_key_count += 1
                     
-                    if field_number in self.number_to_fieldname_map:
-                        field_name = self.number_to_fieldname_map[field_number]
+                    field_name = number_to_fieldname.get(field_number)
+                    if field_name is not None:
                         translated_data[field_name] = actual_value
                         logger.debug(f"Mapped number {field_number} to field '{field_name}'")
                     else:
                         logger.warning(f"Number key {field_number} has no mapping to field name")
                         unmapped_data[key] = actual_value
-                except (ValueError, TypeError):
+                else:
                     # Handle direct field name keys
-                    if key in [field.name for field in self.form_fields]:
+                    if key in field_name_set:
+                        key = sys.intern(key)
                         field_name_data[key] = actual_value
                         fieldname_key_count += 1
                         logger.debug(f"Found direct field name match: '{key}'")
@@ -1345,13 +2176,13 @@ class MainWindow(QMainWindow):
                         continue
                         
                     # Check for partial field name matches
-                    for field in self.form_fields:
-                        if (unmapped_key.lower() in field.name.lower() or
-                            field.name.lower() in unmapped_key.lower()):
-                            translated_data[field.name] = unmapped_value
-                            unmapped_data.pop(unmapped_key)
-                            logger.info(f"Fuzzy matched '{unmapped_key}' to field '{field.name}'")
-                            break
+                    i = _fuzzy_match_index(unmapped_key.lower(), field_names_lower,
+                                           self._field_trigrams, self._short_field_indices)
+                    if i is not None:
+                        field_name = field_names[i]
+                        translated_data[field_name] = unmapped_value
+                        unmapped_data.pop(unmapped_key)
+                        logger.info(f"Fuzzy matched '{unmapped_key}' to field '{field_name}'")
             
             # Last resort: if no translated data, use original data
             if not translated_data and extracted_data:
@@ -1370,22 +2201,16 @@ class MainWindow(QMainWindow):
             
             # --- ENHANCED RESULTS DISPLAY ---
             # Show results with confidence when available
-            result_text = "Extraction Results:\n\n"
+            parts = ["Extraction Results:\n\n"]
             
             # Sort fields by confidence if available
             sorted_fields = []
+            fieldname_to_number = self.fieldname_to_number_map
             for field_name, value in translated_data.items():
-                # Find corresponding confidence
-                conf = None
-                # Try direct field name lookup
-                if field_name in confidence_scores:
-                    conf = confidence_scores[field_name]
-                # Try finding by number
-                else:
-                    for num, fname in self.number_to_fieldname_map.items():
-                        if fname == field_name and str(num) in confidence_scores:
-                            conf = confidence_scores[str(num)]
-                            break
+                # Find corresponding confidence: by field name, else by its number
+                conf = confidence_scores.get(field_name)
+                if conf is None and field_name in fieldname_to_number:
+                    conf = confidence_scores.get(str(fieldname_to_number[field_name]))
                 
                 sorted_fields.append((field_name, value, conf))
             
@@ -1393,31 +2218,37 @@ class MainWindow(QMainWindow):
             sorted_fields.sort(key=lambda x: (-1 * (x[2] or 0), x[0]))
             
             # Display the results
-            for field_name, value, conf in sorted_fields:
-                if conf is not None:
-                    result_text += f"• {field_name}: {value} (confidence: {conf:.2f})\n"
-                else:
-                    result_text += f"• {field_name}: {value}\n"
+            parts.extend(
+                f"• {field_name}: {value} (confidence: {conf:.2f})\n" if conf is not None
+                else f"• {field_name}: {value}\n"
+                for field_name, value, conf in sorted_fields
+            )
 
             # Show unmapped results if any
             if unmapped_data:
-                result_text += "\n--- Unmapped Data ---\n"
-                for key, value in unmapped_data.items():
-                    result_text += f"• {key}: {value}\n"
+                parts.append("\n--- Unmapped Data ---\n")
+                parts.extend(f"• {key}: {value}\n" for key, value in unmapped_data.items())
 
-            self.ai_results.setPlainText(result_text)
+            self.ai_results.setUpdatesEnabled(False)
+            try:
+                self.ai_results.setPlainText("".join(parts))
+            finally:
+                self.ai_results.setUpdatesEnabled(True)
             
             # Update status message
-            fill_rate = len(translated_data) / len(self.form_fields) if self.form_fields else 0
-            self.status_label.setText(f"Extracted {len(translated_data)} field values ({fill_rate:.1%} of form fields)")
+            n_extracted = len(translated_data)
+            n_total = len(self.form_fields)
+            fill_rate = n_extracted / n_total if n_total else 0
+            self.status_label.setText(f"Extracted {n_extracted} field values ({fill_rate:.1%} of form fields)")
             
             # Log the extraction success details
-            logger.info(f"Successfully extracted and mapped {len(translated_data)} fields with fill rate of {fill_rate:.1%}")
+            logger.info("Successfully extracted and mapped %d fields with fill rate of %.1f%%",
+                        n_extracted, fill_rate * 100)
             
             # If we got a good amount of data, show a success message
             if fill_rate >= 0.3:  # At least 30% of fields filled
                 self.show_ai_message("Extraction Complete",
-                                    f"Successfully extracted {len(translated_data)} fields from your documents!")
+                                    f"Successfully extracted {n_extracted} fields from your documents!")
 
         except Exception as e:
             logger.error(f"Error processing AI results: {e}", exc_info=True)
@@ -1446,10 +2277,11 @@ class MainWindow(QMainWindow):
         """Apply JSON data to form fields"""
         try:
             json_text = self.data_text_edit.toPlainText()
-            if not json_text.strip():
+            if not json_text or json_text.isspace():
                 return
                 
-            data = json.loads(json_text)
+            # orjson and json both take str directly; no intermediate UTF-8 copy
+            data = _loads(json_text)
             self.field_mapping_widget.set_field_data(data)
             self.status_label.setText("JSON data applied successfully")
             
@@ -1458,11 +2290,10 @@ class MainWindow(QMainWindow):
 
     def export_to_json(self):
         """Export current field data to JSON"""
-        data = self.field_mapping_widget.get_field_data()
-        # Filter out empty fields
-        filtered_data = {k: v for k, v in data.items() if v.strip()}
+        # Only non-empty fields (cached by the widget until the next edit)
+        filtered_data = self.field_mapping_widget.nonempty_field_data()
         
-        json_text = json.dumps(filtered_data, indent=2)
+        json_text = _dumps(filtered_data).decode('utf-8')
         self.data_text_edit.setPlainText(json_text)
 
     def save_mapping(self):
@@ -1472,32 +2303,37 @@ class MainWindow(QMainWindow):
             return
 
         file_path, _ = QFileDialog.getSaveFileName(
-            self, "Save Field Mapping", "", "JSON Files (*.json)"
+            self, "Save Field Mapping", "", _JSON_FILTER
         )
         
         if file_path:
             data = self.field_mapping_widget.get_field_data()
-            try:
-                with open(file_path, 'w') as f:
-                    json.dump(data, f, indent=2)
-                self.status_label.setText(f"Mapping saved to {file_path}")
-            except Exception as e:
-                QMessageBox.critical(self, "Error", f"Failed to save mapping: {str(e)}")
+            worker = JsonIOWorker(file_path, 'save', data)
+            worker.signals.saved.connect(lambda path: self.status_label.setText(f"Mapping saved to {path}"))
+            worker.signals.error.connect(self._on_json_io_error)
+            QThreadPool.globalInstance().start(worker)
 
     def load_mapping(self):
         """Load field mapping from file"""
         file_path, _ = QFileDialog.getOpenFileName(
-            self, "Load Field Mapping", "", "JSON Files (*.json)"
+            self, "Load Field Mapping", "", _JSON_FILTER
         )
         
         if file_path:
-            try:
-                with open(file_path, 'r') as f:
-                    data = json.load(f)
-                self.field_mapping_widget.set_field_data(data)
-                self.status_label.setText(f"Mapping loaded from {file_path}")
-            except Exception as e:
-                QMessageBox.critical(self, "Error", f"Failed to load mapping: {str(e)}")
+            self.status_label.setText(f"Loading mapping from {file_path}...")
+            worker = JsonIOWorker(file_path, 'load')
+            worker.signals.loaded.connect(self._on_mapping_loaded)
+            worker.signals.error.connect(self._on_json_io_error)
+            QThreadPool.globalInstance().start(worker)
+
+    def _on_mapping_loaded(self, file_path: str, data: dict):
+        """Apply a mapping read by JsonIOWorker"""
+        self.field_mapping_widget.set_field_data(data)
+        self.status_label.setText(f"Mapping loaded from {file_path}")
+
+    def _on_json_io_error(self, error_message: str):
+        """Report a JsonIOWorker failure"""
+        QMessageBox.critical(self, "Error", error_message)
 
     def fill_form(self):
         """Fill the PDF form with current data"""
@@ -1505,30 +2341,26 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "No PDF", "Please select a PDF file first")
             return
 
-        field_data = self.field_mapping_widget.get_field_data()
-        # Filter out empty fields
-        field_data = {k: v for k, v in field_data.items() if v.strip()}
-        
-        if not field_data:
+        if not self.field_mapping_widget.count_nonempty():
             QMessageBox.warning(self, "No Data", "Please enter some field data first")
             return
 
         output_path, _ = QFileDialog.getSaveFileName(
-            self, "Save Filled PDF", "", "PDF Files (*.pdf)"
+            self, "Save Filled PDF", "", _PDF_FILTER
         )
         
         if output_path:
+            # Only non-empty fields; the same dict count_nonempty() built above
+            field_data = self.field_mapping_widget.nonempty_field_data()
             self.progress_bar.setVisible(True)
             self.progress_bar.setValue(0)
             self.status_label.setText("Filling PDF form...")
             
-            self.filler_thread = PDFFormFiller(
-                self.current_pdf_path, field_data, output_path
-            )
-            self.filler_thread.form_filled.connect(self.on_form_filled)
-            self.filler_thread.error_occurred.connect(self.on_fill_error)
-            self.filler_thread.progress_updated.connect(self.progress_bar.setValue)
-            self.filler_thread.start()
+            filler = PDFFormFiller(self.current_pdf_path, field_data, output_path)
+            filler.signals.form_filled.connect(self.on_form_filled)
+            filler.signals.error_occurred.connect(self.on_fill_error)
+            filler.signals.progress_updated.connect(self.progress_bar.setValue)
+            QThreadPool.globalInstance().start(filler)
 
     def on_form_filled(self, output_path: str):
         """Handle successful form filling"""
@@ -1541,8 +2373,10 @@ class MainWindow(QMainWindow):
             QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
         )
         
-        if reply == QMessageBox.StandardButton.Yes:
-            os.system(f'open "{output_path}"' if sys.platform == 'darwin' else f'start "{output_path}"')
+        # openUrl hands off to the desktop without a shell and returns immediately
+        if reply == QMessageBox.StandardButton.Yes and not QDesktopServices.openUrl(QUrl.fromLocalFile(output_path)):
+            QMessageBox.warning(self, "Open Failed",
+                                f"No application is registered to open:\n{output_path}")
 
     def on_fill_error(self, error_message: str):
         """Handle form filling error"""
@@ -1559,8 +2393,6 @@ class MainWindow(QMainWindow):
                 return
             
             # Create a dialog to display recent sources
-            from PyQt6.QtWidgets import QDialog, QVBoxLayout, QListWidget, QDialogButtonBox
-            
             dialog = QDialog(self)
             dialog.setWindowTitle("Recent Data Sources")
             dialog.setMinimumWidth(500)
@@ -1568,15 +2400,24 @@ class MainWindow(QMainWindow):
             
             # List widget to show sources
             sources_list = QListWidget()
-            for i, source in enumerate(recent_sources):
+            sources_list.setSelectionMode(QListWidget.SelectionMode.MultiSelection)
+            items = []
+            for source in recent_sources:
                 source_type = source.get("type", "unknown")
                 path = source.get("path", "")
-                if os.path.exists(path):
-                    item_text = f"{os.path.basename(path)} ({source_type})"
-                    item = QListWidgetItem(item_text)
+                if self._path_exists(path):
+                    item = QListWidgetItem(f"{os.path.basename(path)} ({source_type})")
                     item.setData(Qt.ItemDataRole.UserRole, source)
-                    sources_list.setSelectionMode(QListWidget.SelectionMode.MultiSelection)
+                    items.append(item)
+            
+            sources_list.setUpdatesEnabled(False)
+            sources_list.blockSignals(True)
+            try:
+                for item in items:
                     sources_list.addItem(item)
+            finally:
+                sources_list.blockSignals(False)
+                sources_list.setUpdatesEnabled(True)
             
             layout.addWidget(sources_list)
             
@@ -1589,14 +2430,17 @@ class MainWindow(QMainWindow):
             # Show dialog and process result
             if dialog.exec() == QDialog.DialogCode.Accepted:
                 # Add selected sources
+                new_items = []
                 for item in sources_list.selectedItems():
                     source = item.data(Qt.ItemDataRole.UserRole)
-                    if source.get("type") == "file" and os.path.exists(source.get("path")):
+                    if source.get("type") == "file" and self._path_exists(source.get("path")):
                         file_path = source.get("path")
                         file_name = os.path.basename(file_path)
-                        self.sources_list.addItem(f"File: {file_name}")
-                        self.ai_data_sources.append(('file', str(file_path)))
+                        if not self._add_ai_data_source('file', str(file_path), file_name):
+                            continue
+                        new_items.append(f"File: {file_name}")
                         logger.info(f"Added file source from history: {file_name}")
+                self._add_source_items(new_items)
                 
                 if sources_list.selectedItems():
                     self.status_label.setText(f"Added {len(sources_list.selectedItems())} data sources from history")
@@ -1609,10 +2453,11 @@ class MainWindow(QMainWindow):
     def load_paths_history(self):
         """Load saved file paths from history"""
         try:
-            history_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "paths_history.json")
+            history_file = _HISTORY_PATH
             if os.path.exists(history_file):
-                with open(history_file, 'r') as f:
-                    self.paths_history = json.load(f)
+                with open(history_file, 'rb') as f:
+                    self.paths_history = _loads(f.read())
+                self._paths_history_hash = hash(_dumps(self.paths_history, indent=False))
                 logger.info(f"Loaded paths history with {len(self.paths_history.get('recent_pdfs', []))} PDFs")
             else:
                 # Initialize with empty lists
@@ -1634,38 +2479,29 @@ class MainWindow(QMainWindow):
         try:
             # Update current paths in history
             if self.current_pdf_path and os.path.exists(self.current_pdf_path):
-                # Add to recent PDFs if not already there
-                if self.current_pdf_path not in self.paths_history.get("recent_pdfs", []):
-                    if "recent_pdfs" not in self.paths_history:
-                        self.paths_history["recent_pdfs"] = []
-                    # Add to front of list and limit to 10 entries
-                    self.paths_history["recent_pdfs"].insert(0, self.current_pdf_path)
-                    self.paths_history["recent_pdfs"] = self.paths_history["recent_pdfs"][:10]
+                self._push_recent("recent_pdfs", self.current_pdf_path)
             
             # Add mapping PDF if it exists
             mapping_path = self.mapping_pdf_path_edit.text()
             if mapping_path and os.path.exists(mapping_path):
-                if mapping_path not in self.paths_history.get("recent_maps", []):
-                    if "recent_maps" not in self.paths_history:
-                        self.paths_history["recent_maps"] = []
-                    self.paths_history["recent_maps"].insert(0, mapping_path)
-                    self.paths_history["recent_maps"] = self.paths_history["recent_maps"][:10]
+                self._push_recent("recent_maps", mapping_path)
             
-            # Save data sources
-            data_sources = []
-            for source_type, source_content in self.ai_data_sources:
-                if source_type == 'file' and os.path.exists(source_content):
-                    data_sources.append({"type": source_type, "path": source_content})
+            # Save data sources, one entry per existing file path
+            data_sources = list({
+                source_content: {"type": source_type, "path": source_content}
+                for source_type, source_content, _ in self.ai_data_sources
+                if source_type == 'file' and self._path_exists(source_content)
+            }.values())
             
             if data_sources:
                 self.paths_history["recent_data_sources"] = data_sources
             
-            # Write to JSON file
-            history_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "paths_history.json")
-            with open(history_file, 'w') as f:
-                json.dump(self.paths_history, f, indent=2)
+            # Write to JSON file once the burst of saves settles
+            self._history_dirty = True
+            self._history_flush_timer.start(500)
             
             # Update UI
+            self._refresh_recent_entries()
             self.populate_recent_pdfs_combo()
             self.populate_recent_maps_combo()
             
@@ -1676,16 +2512,78 @@ class MainWindow(QMainWindow):
             logger.error(f"Error saving paths history: {e}")
             QMessageBox.warning(self, "Error", f"Could not save paths history: {str(e)}")
     
+    def _flush_history(self):
+        """Write paths_history to disk atomically if it changed since the last write."""
+        if not self._history_dirty:
+            return
+        try:
+            new_bytes = _dumps(self.paths_history, indent=False)
+            new_hash = hash(new_bytes)
+            self._history_dirty = False
+            if new_hash == self._paths_history_hash:
+                logger.debug("Paths history unchanged; skipping write")
+                return
+            history_file = _HISTORY_PATH
+            tmp_file = history_file + ".tmp"
+            with open(tmp_file, 'wb') as f:
+                f.write(new_bytes)
+            os.replace(tmp_file, history_file)
+            self._paths_history_hash = new_hash
+            logger.debug("Flushed paths history to disk")
+        except Exception as e:
+            logger.error(f"Error writing paths history: {e}")
+    
+    def _path_exists(self, path: str, ttl: float = 2.0) -> bool:
+        """os.path.exists with a short-lived cache for repopulating history widgets."""
+        now = time.monotonic()
+        cached = self._exists_cache.get(path)
+        if cached and now - cached[0] < ttl:
+            return cached[1]
+        exists = os.path.exists(path)
+        self._exists_cache[path] = (now, exists)
+        return exists
+    
+    def _push_recent(self, key: str, path: str, limit: int = 10):
+        """Move path to the front of a recent list, deduplicated and capped at limit."""
+        # dict.fromkeys dedupes in one pass and keeps most-recent-first order
+        recent = dict.fromkeys([path, *self.paths_history.get(key, [])])
+        self.paths_history[key] = list(recent)[:limit]
+    
+    def _refresh_recent_entries(self, *keys: str) -> bool:
+        """Rebuild (basename, path) entries for existing history paths; True if any changed."""
+        changed = False
+        for key in keys or ("recent_pdfs", "recent_maps"):
+            entries = [(os.path.basename(path), path)
+                       for path in self.paths_history.get(key, []) if self._path_exists(path)]
+            if entries != self._recent_entries.get(key):
+                self._recent_entries[key] = entries
+                changed = True
+        return changed
+    
+    def _validate_recent_entries(self):
+        """Drop recent files which no longer exist; run when a recent list opens."""
+        # The list is about to be shown, so check the disk now rather than
+        # trusting the short-lived _path_exists cache
+        self._exists_cache.clear()
+        if self._refresh_recent_entries():
+            self.populate_recent_pdfs_combo()
+            self.populate_recent_maps_combo()
+    
     def populate_recent_pdfs_combo(self):
         """Populate the recent PDFs combo box"""
         try:
-            self.recent_pdfs_combo.clear()
-            self.recent_pdfs_combo.addItem("Select a recent PDF...")
-            
-            for pdf_path in self.paths_history.get("recent_pdfs", []):
-                if os.path.exists(pdf_path):
-                    # Display only the filename in the dropdown
-                    self.recent_pdfs_combo.addItem(os.path.basename(pdf_path), pdf_path)
+            # Block currentIndexChanged (-> load_selected_pdf) and repaints while refilling
+            with QSignalBlocker(self.recent_pdfs_combo):
+                self.recent_pdfs_combo.setUpdatesEnabled(False)
+                try:
+                    self.recent_pdfs_combo.clear()
+                    self.recent_pdfs_combo.addItem("Select a recent PDF...")
+                    
+                    for name, pdf_path in self._recent_entries.get("recent_pdfs", []):
+                        # Display only the filename in the dropdown
+                        self.recent_pdfs_combo.addItem(name, pdf_path)
+                finally:
+                    self.recent_pdfs_combo.setUpdatesEnabled(True)
             
         except Exception as e:
             logger.error(f"Error populating recent PDFs: {e}")
@@ -1693,17 +2591,32 @@ class MainWindow(QMainWindow):
     def populate_recent_maps_combo(self):
         """Populate the recent mapping PDFs combo box"""
         try:
-            self.recent_maps_combo.clear()
-            self.recent_maps_combo.addItem("Select a recent map...")
-            
-            for map_path in self.paths_history.get("recent_maps", []):
-                if os.path.exists(map_path):
-                    # Display only the filename in the dropdown
-                    self.recent_maps_combo.addItem(os.path.basename(map_path), map_path)
+            # Block currentIndexChanged (-> load_selected_map) and repaints while refilling
+            with QSignalBlocker(self.recent_maps_combo):
+                self.recent_maps_combo.setUpdatesEnabled(False)
+                try:
+                    self.recent_maps_combo.clear()
+                    self.recent_maps_combo.addItem("Select a recent map...")
+                    
+                    for name, map_path in self._recent_entries.get("recent_maps", []):
+                        # Display only the filename in the dropdown
+                        self.recent_maps_combo.addItem(name, map_path)
+                finally:
+                    self.recent_maps_combo.setUpdatesEnabled(True)
             
         except Exception as e:
             logger.error(f"Error populating recent maps: {e}")
     
+    def _recent_file_missing(self, path: str, label: str) -> bool:
+        """Report a selected recent file that is gone and drop it from the lists."""
+        if os.path.exists(path):
+            return False
+        logger.warning(f"Recent {label} no longer exists: {path}")
+        QMessageBox.warning(self, "File Not Found",
+                            f"The selected {label} no longer exists:\n{path}")
+        self._validate_recent_entries()
+        return True
+    
     def load_selected_pdf(self, index):
         """Load the selected PDF from the combo box"""
         if index <= 0:  # Skip the "Select a recent PDF..." item
@@ -1712,7 +2625,7 @@ class MainWindow(QMainWindow):
         try:
             # Get the full path from the combo box's user data
             pdf_path = self.recent_pdfs_combo.itemData(index)
-            if pdf_path and os.path.exists(pdf_path):
+            if pdf_path and not self._recent_file_missing(pdf_path, "PDF"):
                 self.current_pdf_path = pdf_path
                 self.file_path_edit.setText(pdf_path)
                 self.extract_fields()
@@ -1728,7 +2641,7 @@ class MainWindow(QMainWindow):
         try:
             # Get the full path from the combo box's user data
             map_path = self.recent_maps_combo.itemData(index)
-            if map_path and os.path.exists(map_path):
+            if map_path and not self._recent_file_missing(map_path, "mapping PDF"):
                 self.mapping_pdf_path_edit.setText(map_path)
                 logger.info(f"Loaded mapping PDF from history: {map_path}")
         except Exception as e:
@@ -1736,9 +2649,21 @@ class MainWindow(QMainWindow):
 
 def main():
     """Main entry point for PDF Form Filler v3"""
+    # Set up logging
+    logging.basicConfig(
+        filename='pdf_form_filler_debug.log',
+        level=logging.DEBUG,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    logger.info("Application starting")
+
     app = QApplication(sys.argv)
     app.setApplicationName("PDF Form Filler")
     app.setApplicationVersion("3.0")
+    # One application-wide sheet, parsed once before any widget is created
+    app.setStyleSheet(_THEME_QSS)
+    if not USE_NATIVE_DIALOGS:
+        app.setAttribute(Qt.ApplicationAttribute.AA_DontUseNativeDialogs)
     
     # Set application icon if available
     try:
@@ -15,9 +15,10 @@ import base64
 import logging
 import traceback
 import threading
-import concurrent.futures
+import asyncio
+import hashlib
 from typing import Dict, List, Optional, Tuple, Union, Any
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, replace
 from queue import Queue
 import time
 
@@ -56,12 +57,50 @@ except ImportError:
     FIELD_MAPPING_AVAILABLE = False
     FormField = None
 
+# pdftk dump_data_fields lines this app reads, and the field attribute each
+# one sets ("---" separates fields, FieldStateOption adds an option)
+_PDFTK_LINE_RE = re.compile(
+    r'(---)|(FieldName|FieldType|FieldValue|FieldStateOption|FieldNameAlt):\s*(.*?)\s*$'
+)
+_PDFTK_ATTRIBUTES = {'FieldType': 'type', 'FieldValue': 'value', 'FieldNameAlt': 'alt_text'}
+
+if FIELD_MAPPING_AVAILABLE:
+    def _make_field(attrs: Dict[str, Any]) -> FormField:
+        """Build a FormField from parsed pdftk attributes"""
+        return FormField(
+            name=attrs.get('name', ''),
+            type=attrs.get('type', 'text'),
+            alt_text=attrs.get('alt_text', ''),
+            value=attrs.get('value', ''),
+            state_options=attrs.get('options', [])
+        )
+else:
+    def _make_field(attrs: Dict[str, Any]) -> Dict[str, Any]:
+        """Simple dict-based field for compatibility"""
+        return {
+            'name': attrs.get('name', ''),
+            'type': attrs.get('type', 'text'),
+            'alt_text': attrs.get('alt_text', ''),
+            'value': attrs.get('value', ''),
+            'options': attrs.get('options', [])
+        }
+
 # PDF processing imports
 try:
-    import PyPDF2
-    HAS_PYPDF2 = True
+    import fitz  # PyMuPDF
+    HAS_PYMUPDF = True
+except ImportError:
+    HAS_PYMUPDF = False
+
+try:
+    from pypdf import PdfReader
+    HAS_PYPDF = True
 except ImportError:
-    HAS_PYPDF2 = False
+    try:
+        from PyPDF2 import PdfReader  # pypdf's predecessor, same reader API
+        HAS_PYPDF = True
+    except ImportError:
+        HAS_PYPDF = False
 
 try:
     import pdfplumber
@@ -82,6 +121,136 @@ try:
 except ImportError:
     HAS_ANTHROPIC = False
 
+# Shared LLM helpers; resolved once here rather than by an import per API call
+try:
+    import llm_client
+    HAS_LLM_CLIENT = True
+except ImportError:
+    llm_client = None
+    HAS_LLM_CLIENT = False
+
+# Direct-API clients, used only when llm_client is not importable, retry
+# 429/5xx/connection errors with exponential backoff (honouring Retry-After)
+# and give up on a hung request after the timeout; llm_client builds its own
+# clients with the same settings
+_API_MAX_RETRIES = 5
+_API_TIMEOUT = 60.0
+
+# Document characters packed into one batched AI call (~75k tokens, inside the
+# Claude 3 / GPT-4o context windows); larger sets are split into several calls
+_BATCH_CONTENT_BUDGET = 300_000
+# Completion budget: a base for the JSON scaffolding plus a per-field share,
+# capped at the model's output limit (_output_limit).
+# Each field is answered as '"NAME": "VALUE [Field: LABEL]"' plus a
+# '"NAME": 0.95' confidence entry, so its share is the name (twice) and label
+# text at _RESPONSE_CHARS_PER_TOKEN (XFA paths such as
+# 'FL-142[0].Page1[0].Name[0]' are punctuation-heavy and tokenize densely),
+# an allowance for the value, and the quotes, colons and score themselves
+_RESPONSE_BASE_TOKENS = 80
+_RESPONSE_CHARS_PER_TOKEN = 2
+_RESPONSE_VALUE_TOKENS = 16
+_RESPONSE_ENTRY_TOKENS = 12
+# Batched calls answer in a compact form, '"INDEX": ["VALUE", 0.95]' keyed by
+# the field's number, so a field costs its value plus _BATCH_ENTRY_TOKENS
+# whatever its name; a batch holds no more documents than the model's output
+# limit can answer in that form
+_BATCH_DOC_TOKENS = 20
+_BATCH_ENTRY_TOKENS = 10
+
+# Most completion tokens each model may return (longest matching prefix wins);
+# unknown models get _DEFAULT_OUTPUT_LIMIT
+_MODEL_OUTPUT_LIMITS = {
+    "claude-3-5-sonnet": 8192,
+    "claude-3-opus": 4096,
+    "claude-3-sonnet": 4096,
+    "claude-3-haiku": 4096,
+    "gpt-4o": 16384,
+    "gpt-4-turbo": 4096,
+    "gpt-4-vision": 4096,
+    "gpt-4": 4096,
+    "gpt-3.5-turbo": 4096,
+}
+_DEFAULT_OUTPUT_LIMIT = 4096
+
+# Document text sent per prompt: windows of _SPAN_CONTEXT characters around
+# keyword hits, merged and capped at _RELEVANT_TEXT_BUDGET characters
+_RELEVANT_TEXT_BUDGET = 8000
+_SPAN_CONTEXT = 200
+# Field-name words too generic to locate a value (pdftk/XFA path segments)
+_FIELD_STOPWORDS = frozenset({
+    'topmostsubform', 'subform', 'page', 'form', 'field', 'fields', 'text',
+    'check', 'checkbox', 'box', 'button', 'line', 'item', 'list', 'table',
+    'row', 'column', 'section', 'part', 'header', 'footer', 'caption',
+})
+_FIELD_WORD_RE = re.compile(r'[A-Z]?[a-z]+|[A-Z]+(?![a-z])')
+# Phrases that mark the interesting parts of each document type
+_DOC_TYPE_ANCHORS = {
+    'financial_schedule': ['$', 'loan', 'credit card', 'account', 'balance', 'total'],
+    'attorney_legal': ['attorney', 'phone', 'telephone', 'email', 'bar no', 'firm'],
+    'court_filing': ['case number', 'petitioner', 'respondent', 'court', 'county'],
+    'general_legal': ['$', 'phone', 'case number', 'petitioner', 'address', 'date'],
+}
+
+# Content markers for each document type, in _classify_document_type order
+_DOC_TYPE_RE = re.compile(
+    r'(?P<financial_schedule>schedule of assets|student loans|credit cards)'
+    r'|(?P<attorney_legal>attorney or party without attorney|telephone no)'
+    r'|(?P<court_filing>superior court|case number|petitioner)',
+    re.IGNORECASE
+)
+_DOC_TYPE_RANK = {'financial_schedule': 0, 'attorney_legal': 1, 'court_filing': 2}
+
+# Extraction strategy text per document type, see _classify_document_type
+_STRATEGIES = {
+    'financial_schedule': """
+**FINANCIAL DOCUMENT STRATEGY:**
+- Focus on monetary amounts, debts, assets
+- Extract student loans, credit cards, bank accounts
+- Look for property values, vehicle values
+- Extract total debt and asset calculations
+- Financial dates and account details""",
+    
+    'attorney_legal': """
+**ATTORNEY/LEGAL DOCUMENT STRATEGY:**  
+- Focus on attorney contact information
+- Extract phone numbers, email addresses
+- Look for law firm names and addresses
+- Case numbers and court information
+- Legal party names (petitioner/respondent)""",
+    
+    'court_filing': """
+**COURT FILING STRATEGY:**
+- Focus on case identification information
+- Extract court names and locations
+- Party names and relationships
+- Filing dates and case numbers
+- Legal status and proceedings""",
+    
+    'general_legal': """
+**GENERAL LEGAL STRATEGY:**
+- Extract any contact information
+- Look for names, dates, locations
+- Financial information if present
+- Case or matter identifiers"""
+}
+
+# Reused for every AI response; see _load_response_json
+_RESPONSE_DECODER = json.JSONDecoder()
+
+# '@' (email) or '(' (phone area code) marks a value as contact info
+_CONTACT_CHARS = frozenset('@(')
+
+def _output_limit(model: str) -> int:
+    """Largest max_tokens the given model accepts"""
+    prefixes = [prefix for prefix in _MODEL_OUTPUT_LIMITS if model.startswith(prefix)]
+    if not prefixes:
+        return _DEFAULT_OUTPUT_LIMIT
+    return _MODEL_OUTPUT_LIMITS[max(prefixes, key=len)]
+
+def _value_features(value: str) -> Tuple[bool, bool, int]:
+    """Scan a value once for the traits _is_better_value compares"""
+    return ('$' in value, not _CONTACT_CHARS.isdisjoint(value), len(value))
+
 @dataclass
 class DocumentSource:
     """Container for a document source"""
@@ -90,6 +259,7 @@ class DocumentSource:
     file_path: Optional[str] = None
     extraction_method: Optional[str] = None
     character_count: int = 0
+    doc_type: Optional[str] = None  # set by _classify_document_type
 
 @dataclass
 class ExtractionResult:
@@ -100,6 +270,15 @@ class ExtractionResult:
     processing_time: float
     token_count: Optional[int] = None
     extraction_method: str = "ai"
+    # field -> (has_money, has_contact, length), used by the merge
+    value_features: Dict[str, Tuple[bool, bool, int]] = None
+    
+    def __post_init__(self):
+        if self.value_features is None:
+            self.value_features = {
+                k: _value_features(v if isinstance(v, str) else str(v))
+                for k, v in self.extracted_data.items()
+            }
 
 @dataclass  
 class MergedResult:
@@ -118,60 +297,188 @@ class MultiThreadedDocumentProcessor:
         self.model = model
         self.provider = provider
         self.max_workers = 3  # Limit concurrent API calls
+        # Direct-API clients, created on first use and kept for their connection pools
+        self._claude_client = None
+        self._openai_client = None
+        self._field_names_cache = None  # (form_fields, compact JSON of their names)
         
     def process_documents_parallel(self, documents: List[DocumentSource], 
                                  form_fields: List[FormField]) -> MergedResult:
         """Process multiple documents in parallel and merge results"""
-        print(f"\n🔄 MULTI-THREADED PROCESSING STARTED")
-        print(f"=" * 60)
-        print(f"📊 Processing {len(documents)} documents with {self.max_workers} workers")
-        print(f"🎯 Target fields: {len(form_fields)}")
-        print(f"🤖 AI Provider: {self.provider}")
+        logger.info("Multi-threaded processing started: %d documents, %d workers, "
+                    "%d target fields, provider %s",
+                    len(documents), self.max_workers, len(form_fields), self.provider)
         
         start_time = time.time()
         extraction_results = []
         
-        # Process documents in parallel
-        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            # Submit all document processing tasks
-            future_to_doc = {
-                executor.submit(self._process_single_document, doc, form_fields): doc 
-                for doc in documents
-            }
-            
-            # Collect results as they complete
-            for future in concurrent.futures.as_completed(future_to_doc):
-                doc = future_to_doc[future]
-                try:
-                    result = future.result()
-                    extraction_results.append(result)
-                    print(f"✅ Completed: {doc.name} ({len(result.extracted_data)} fields)")
-                except Exception as e:
-                    print(f"❌ Failed: {doc.name} - {str(e)}")
-                    # Create empty result for failed document
-                    extraction_results.append(ExtractionResult(
-                        document_name=doc.name,
-                        extracted_data={},
-                        confidence_scores={},
-                        processing_time=0,
-                        extraction_method="failed"
-                    ))
+        # The same text added twice (e.g. a PDF and a paste of it) is only sent
+        # to the AI once; its result is copied to the other names afterwards
+        unique_documents, duplicates = self._dedupe_documents(documents)
+        
+        # One AI call per batch of documents instead of one per document; only
+        # sets too large for a single prompt are split, and those batches run
+        # in parallel
+        batches = self._batch_documents(unique_documents, form_fields)
+        logger.debug("%d AI call(s) for %d documents", len(batches), len(documents))
+        
+        # Serialize the field list once; every prompt of this run reuses it
+        self._field_names_json(form_fields)
+        
+        # Batches run concurrently, at most max_workers at a time, each AI call
+        # on a worker thread (asyncio.to_thread) so the blocking SDK calls overlap
+        extraction_results = asyncio.run(self._gather(batches, form_fields))
+        if duplicates:
+            extraction_results += [
+                replace(result, document_name=name, processing_time=0.0)
+                for result in extraction_results
+                for name in duplicates.get(result.document_name, ())
+            ]
         
         # Merge all results intelligently
         merged_result = self._merge_extraction_results(extraction_results, form_fields)
         
         total_time = time.time() - start_time
-        print(f"\n🎉 MULTI-THREADED PROCESSING COMPLETED")
-        print(f"⏱️  Total time: {total_time:.2f}s")
-        print(f"📊 Final result: {merged_result.total_fields} fields from {len(documents)} documents")
+        logger.info("Multi-threaded processing completed in %.2fs: %d fields from %d documents",
+                    total_time, merged_result.total_fields, len(documents))
         
         return merged_result
     
+    def _dedupe_documents(self, documents: List[DocumentSource]
+                          ) -> Tuple[List[DocumentSource], Dict[str, List[str]]]:
+        """Keep the first document per distinct content; map its name to the names of its copies"""
+        unique = []
+        duplicates = {}
+        first_by_hash = {}
+        for doc in documents:
+            digest = hashlib.blake2b(doc.content.encode('utf-8', 'ignore'), digest_size=16).digest()
+            first = first_by_hash.setdefault(digest, doc)
+            if first is doc:
+                unique.append(doc)
+            else:
+                duplicates.setdefault(first.name, []).append(doc.name)
+                logger.debug("Skipping %s: same content as %s", doc.name, first.name)
+        return unique, duplicates
+    
+    def _batch_documents(self, documents: List[DocumentSource],
+                         form_fields: List[FormField]) -> List[List[DocumentSource]]:
+        """Pack documents into as few batches as fit _BATCH_CONTENT_BUDGET and the output limit"""
+        # A truncated reply fails the whole batch, so cap the documents per
+        # call at what the model's output limit can answer for this many fields
+        max_documents = max(1, _output_limit(self.model) // self._batch_budget_tokens(form_fields))
+        batches = []
+        current = []
+        current_size = 0
+        for doc in documents:
+            # Prompts carry at most _RELEVANT_TEXT_BUDGET characters per document
+            size = min(len(doc.content), _RELEVANT_TEXT_BUDGET)
+            if current and (current_size + size > _BATCH_CONTENT_BUDGET
+                            or len(current) >= max_documents):
+                batches.append(current)
+                current = []
+                current_size = 0
+            current.append(doc)
+            current_size += size
+        if current:
+            batches.append(current)
+        return batches
+    
+    async def _gather(self, batches: List[List[DocumentSource]],
+                      form_fields: List[FormField]) -> List[ExtractionResult]:
+        """Run every batch on the event loop, max_workers in flight at once"""
+        semaphore = asyncio.Semaphore(self.max_workers)
+        
+        async def run(batch: List[DocumentSource]) -> List[ExtractionResult]:
+            async with semaphore:
+                try:
+                    batch_results = await self._process_document_batch_async(batch, form_fields)
+                except Exception as e:
+                    logger.error("Failed batch %s: %s", [doc.name for doc in batch], e)
+                    # Create empty results for the failed documents
+                    batch_results = [
+                        ExtractionResult(
+                            document_name=doc.name,
+                            extracted_data={},
+                            confidence_scores={},
+                            processing_time=0,
+                            extraction_method="failed"
+                        )
+                        for doc in batch
+                    ]
+            for result in batch_results:
+                logger.info("Completed %s (%d fields)", result.document_name, len(result.extracted_data))
+            return batch_results
+        
+        grouped = await asyncio.gather(*(run(batch) for batch in batches))
+        return [result for batch_results in grouped for result in batch_results]
+    
+    async def _process_document_batch_async(self, documents: List[DocumentSource],
+                                            form_fields: List[FormField]) -> List[ExtractionResult]:
+        """Extract data for several documents with a single AI call"""
+        if len(documents) == 1:
+            return [await self._process_single_document_async(documents[0], form_fields)]
+        
+        logger.debug("Processing batch: %s", [doc.name for doc in documents])
+        start_time = time.time()
+        
+        prompt = self._create_batched_prompt(documents, form_fields)
+        max_tokens = min(_output_limit(self.model),
+                         self._batch_budget_tokens(form_fields) * len(documents))
+        response_text = await self._call_ai_async(
+            prompt, f"batch of {len(documents)}", max_tokens)
+        per_doc = self._parse_batched_response(response_text, len(documents), form_fields)
+        
+        # The documents share one call; split its time evenly between them
+        processing_time = (time.time() - start_time) / len(documents)
+        results = []
+        for doc_id, document in enumerate(documents):
+            parsed = per_doc.get(doc_id)
+            results.append(ExtractionResult(
+                document_name=document.name,
+                extracted_data=parsed[0] if parsed else {},
+                confidence_scores=parsed[1] if parsed else {},
+                processing_time=processing_time,
+                extraction_method=self.provider if parsed else "failed"
+            ))
+        return results
+    
+    async def _process_single_document_async(self, document: DocumentSource,
+                                             form_fields: List[FormField]) -> ExtractionResult:
+        """Async counterpart of _process_single_document"""
+        logger.debug("Processing %s (%d characters)", document.name, len(document.content))
+        
+        start_time = time.time()
+        
+        try:
+            prompt = self._create_focused_prompt(document, form_fields)
+            response_text = await self._call_ai_async(
+                prompt, document.name, self._budget_tokens(form_fields))
+            extracted_data, confidence_scores = self._parse_ai_response(response_text)
+            
+            processing_time = time.time() - start_time
+            logger.debug("Extracted %d fields in %.2fs", len(extracted_data), processing_time)
+            return ExtractionResult(
+                document_name=document.name,
+                extracted_data=extracted_data,
+                confidence_scores=confidence_scores,
+                processing_time=processing_time,
+                extraction_method=self.provider
+            )
+            
+        except Exception as e:
+            logger.error("Error processing %s: %s", document.name, e)
+            return ExtractionResult(
+                document_name=document.name,
+                extracted_data={},
+                confidence_scores={},
+                processing_time=time.time() - start_time,
+                extraction_method="failed"
+            )
+    
     def _process_single_document(self, document: DocumentSource, 
                                form_fields: List[FormField]) -> ExtractionResult:
         """Process a single document with focused AI analysis"""
-        print(f"\n🔍 Processing: {document.name}")
-        print(f"   📄 Content: {len(document.content)} characters")
+        logger.debug("Processing %s (%d characters)", document.name, len(document.content))
         
         start_time = time.time()
         
@@ -180,7 +487,8 @@ class MultiThreadedDocumentProcessor:
             prompt = self._create_focused_prompt(document, form_fields)
             
             # Call AI with document-specific context
-            extracted_data, confidence_scores = self._call_ai_for_document(prompt, document.name)
+            extracted_data, confidence_scores = self._call_ai_for_document(
+                prompt, document.name, self._budget_tokens(form_fields))
             
             processing_time = time.time() - start_time
             
@@ -192,11 +500,11 @@ class MultiThreadedDocumentProcessor:
                 extraction_method=self.provider
             )
             
-            print(f"   ✅ Extracted {len(extracted_data)} fields in {processing_time:.2f}s")
+            logger.debug("Extracted %d fields in %.2fs", len(extracted_data), processing_time)
             return result
             
         except Exception as e:
-            print(f"   ❌ Error processing {document.name}: {str(e)}")
+            logger.error("Error processing %s: %s", document.name, e)
             return ExtractionResult(
                 document_name=document.name,
                 extracted_data={},
@@ -205,12 +513,35 @@ class MultiThreadedDocumentProcessor:
                 extraction_method="failed"
             )
     
+    def _budget_tokens(self, form_fields: List[FormField]) -> int:
+        """max_tokens for one document's answer, sized to the fields it may fill"""
+        # Generation time grows with the tokens allowed, so small forms get a
+        # tight ceiling instead of a flat 1000
+        name_chars = sum(2 * len(f.name) + len(f.alt_text or f.name) for f in form_fields)
+        per_field = _RESPONSE_VALUE_TOKENS + _RESPONSE_ENTRY_TOKENS
+        return min(_output_limit(self.model),
+                   _RESPONSE_BASE_TOKENS + per_field * len(form_fields)
+                   + name_chars // _RESPONSE_CHARS_PER_TOKEN)
+    
+    def _batch_budget_tokens(self, form_fields: List[FormField]) -> int:
+        """max_tokens for one document's share of a batched, index-keyed answer"""
+        return _BATCH_DOC_TOKENS + (_RESPONSE_VALUE_TOKENS + _BATCH_ENTRY_TOKENS) * len(form_fields)
+    
+    def _field_names_json(self, form_fields: List[FormField]) -> str:
+        """Compact JSON list of the field names, built once per field list"""
+        cached = self._field_names_cache
+        if cached is None or cached[0] is not form_fields:
+            # No indentation: the list goes into every prompt, and the
+            # whitespace of indent=2 is all extra tokens
+            names_json = json.dumps([f.name for f in form_fields],
+                                    separators=(',', ':'), ensure_ascii=False)
+            cached = self._field_names_cache = (form_fields, names_json)
+        return cached[1]
+    
     def _create_focused_prompt(self, document: DocumentSource, 
                              form_fields: List[FormField]) -> str:
         """Create a focused prompt for a single document"""
         
-        field_names = [f.name for f in form_fields]
-        
         # Determine document type for specialized extraction
         doc_type = self._classify_document_type(document)
         
@@ -228,10 +559,10 @@ class MultiThreadedDocumentProcessor:
 {self._get_document_specific_strategy(doc_type)}
 
 📋 TARGET FORM FIELDS:
-{json.dumps(field_names, indent=2)}
+{self._field_names_json(form_fields)}
 
 📄 DOCUMENT CONTENT:
-{document.content}
+{self._extract_relevant_spans(document.content, form_fields, doc_type)}
 
 🎯 EXTRACTION INSTRUCTIONS:
 
@@ -255,192 +586,330 @@ Extract relevant data from this {doc_type} document now."""
 
         return prompt
     
+    def _create_batched_prompt(self, documents: List[DocumentSource],
+                               form_fields: List[FormField]) -> str:
+        """Create one prompt covering several documents, answered per doc_id"""
+        
+        sections = []
+        for doc_id, document in enumerate(documents):
+            doc_type = self._classify_document_type(document)
+            sections.append(
+                f'<doc id="{doc_id}" name="{document.name}" type="{doc_type}">\n'
+                f'{self._get_document_specific_strategy(doc_type).strip()}\n\n'
+                f'{self._extract_relevant_spans(document.content, form_fields, doc_type)}\n'
+                f'</doc>'
+            )
+        documents_block = "\n\n".join(sections)
+        # Answers refer to fields by number, so long field names are not
+        # repeated once per document and field in the output
+        numbered_fields = "\n".join(f"{i}: {field.name}" for i, field in enumerate(form_fields))
+        
+        prompt = f"""You are a legal document analyst performing TARGETED EXTRACTION on {len(documents)} documents.
+
+🎯 CURRENT TASK: Analyze each document below SEPARATELY and extract relevant data from it.
+
+📄 DOCUMENTS TO ANALYZE (each with its extraction strategy):
+
+{documents_block}
+
+📋 TARGET FORM FIELDS (NUMBER: NAME):
+{numbered_fields}
+
+🎯 EXTRACTION INSTRUCTIONS:
+
+1. **ONE RESULT PER DOCUMENT** - Extract only data that exists in that specific document
+   and list only the fields you found, keyed by field NUMBER
+2. **DOCUMENT-TYPE AWARENESS** - Follow the strategy given with each document
+3. **TARGETED EXTRACTION** - Only extract fields that make sense for each document type
+4. **QUALITY OVER QUANTITY** - Extract accurate data rather than guessing
+5. **CONFIDENCE SCORING** - Higher confidence for clear, obvious data
+
+RETURN FORMAT (JSON only):
+{{
+    "results": [
+        {{
+            "doc_id": 0,
+            "fields": {{
+                "FIELD_NUMBER": ["EXTRACTED_VALUE", 0.95]
+            }}
+        }}
+    ]
+}}
+
+Extract relevant data from all {len(documents)} documents now."""
+
+        return prompt
+    
+    def _extract_relevant_spans(self, content: str, form_fields: List[FormField],
+                                doc_type: str) -> str:
+        """Cut a long document down to the passages around field keywords"""
+        # Short documents go in whole
+        if len(content) <= _RELEVANT_TEXT_BUDGET:
+            return content
+        
+        keywords = set(_DOC_TYPE_ANCHORS.get(doc_type, _DOC_TYPE_ANCHORS['general_legal']))
+        for field in form_fields:
+            for word in _FIELD_WORD_RE.findall(field.name):
+                word = word.lower()
+                if len(word) >= 4 and word not in _FIELD_STOPWORDS:
+                    keywords.add(word)
+        
+        # Longest first so an alternation prefers "credit card" over "credit"
+        pattern = '|'.join(map(re.escape, sorted(keywords, key=len, reverse=True)))
+        spans = []
+        for match in re.finditer(pattern, content, re.IGNORECASE):
+            start = max(0, match.start() - _SPAN_CONTEXT)
+            end = match.end() + _SPAN_CONTEXT
+            if spans and start <= spans[-1][1]:
+                spans[-1][1] = max(spans[-1][1], end)
+            else:
+                spans.append([start, end])
+        
+        if not spans:
+            # Nothing recognisable; the beginning usually holds the caption
+            return content[:_RELEVANT_TEXT_BUDGET]
+        
+        parts = []
+        remaining = _RELEVANT_TEXT_BUDGET
+        for start, end in spans:
+            part = content[start:min(end, start + remaining)]
+            parts.append(part)
+            remaining -= len(part)
+            if remaining <= 0:
+                break
+        return "\n...\n".join(parts)
+    
     def _classify_document_type(self, document: DocumentSource) -> str:
-        """Classify document type based on content and filename"""
-        content_lower = document.content.lower()
+        """Classify document type based on content and filename
+        
+        The result is cached on the document, so the content is lowercased
+        and scanned once however many prompts are built from it.
+        """
+        if document.doc_type is None:
+            document.doc_type = self._compute_document_type(document)
+        return document.doc_type
+    
+    def _compute_document_type(self, document: DocumentSource) -> str:
         name_lower = document.name.lower()
         
-        # Financial document indicators
-        if ('fl-142' in name_lower or 'schedule of assets' in content_lower or 
-            'student loans' in content_lower or 'credit cards' in content_lower):
+        # Form numbers in the file name decide outright
+        if 'fl-142' in name_lower:
             return 'financial_schedule'
-            
-        # Attorney/legal document indicators  
-        elif ('fl-120' in name_lower or 'attorney or party without attorney' in content_lower or
-              'telephone no' in content_lower):
+        
+        # One case-insensitive pass over the content. Types are ranked
+        # (financial, then attorney, then court), so keep the highest-ranked
+        # type seen and stop as soon as the top one turns up.
+        found = None
+        for match in _DOC_TYPE_RE.finditer(document.content):
+            doc_type = match.lastgroup
+            if doc_type == 'financial_schedule':
+                return doc_type
+            if found is None or _DOC_TYPE_RANK[doc_type] < _DOC_TYPE_RANK[found]:
+                found = doc_type
+        
+        if found == 'attorney_legal' or 'fl-120' in name_lower:
             return 'attorney_legal'
-            
-        # Court filing indicators
-        elif ('superior court' in content_lower or 'case number' in content_lower or
-              'petitioner' in content_lower):
-            return 'court_filing'
-            
-        # Default
-        else:
-            return 'general_legal'
+        return found or 'general_legal'
     
     def _get_document_specific_strategy(self, doc_type: str) -> str:
         """Get extraction strategy based on document type"""
-        strategies = {
-            'financial_schedule': """
-**FINANCIAL DOCUMENT STRATEGY:**
-- Focus on monetary amounts, debts, assets
-- Extract student loans, credit cards, bank accounts
-- Look for property values, vehicle values
-- Extract total debt and asset calculations
-- Financial dates and account details""",
-            
-            'attorney_legal': """
-**ATTORNEY/LEGAL DOCUMENT STRATEGY:**  
-- Focus on attorney contact information
-- Extract phone numbers, email addresses
-- Look for law firm names and addresses
-- Case numbers and court information
-- Legal party names (petitioner/respondent)""",
-            
-            'court_filing': """
-**COURT FILING STRATEGY:**
-- Focus on case identification information
-- Extract court names and locations
-- Party names and relationships
-- Filing dates and case numbers
-- Legal status and proceedings""",
-            
-            'general_legal': """
-**GENERAL LEGAL STRATEGY:**
-- Extract any contact information
-- Look for names, dates, locations
-- Financial information if present
-- Case or matter identifiers"""
-        }
-        
-        return strategies.get(doc_type, strategies['general_legal'])
+        return _STRATEGIES.get(doc_type, _STRATEGIES['general_legal'])
     
-    def _call_ai_for_document(self, prompt: str, doc_name: str) -> Tuple[Dict[str, str], Dict[str, float]]:
-        """Call AI API for a specific document"""
+    def _call_ai_for_document(self, prompt: str, doc_name: str, max_tokens: int = 1000,
+                              raw: bool = False):
+        """Call AI API for a specific document
+        
+        Returns (extracted_data, confidence_scores), or the response text
+        ("" on failure) when raw is set.
+        """
+        empty = "" if raw else ({}, {})
         try:
             if self.provider == "claude" or self.provider == "anthropic":
-                return self._call_claude(prompt, doc_name)
+                response_text = self._call_claude(prompt, doc_name, max_tokens)
             elif self.provider == "openai":
-                return self._call_openai(prompt, doc_name)
+                response_text = self._call_openai(prompt, doc_name, max_tokens)
             else:
-                print(f"   ⚠️ Unknown provider {self.provider}, using pattern matching")
-                return {}, {}
+                logger.warning("Unknown provider %s, using pattern matching", self.provider)
+                return empty
                 
         except Exception as e:
-            print(f"   ❌ AI call failed for {doc_name}: {str(e)}")
-            return {}, {}
+            logger.error("AI call failed for %s: %s", doc_name, e)
+            return empty
+        
+        return response_text if raw else self._parse_ai_response(response_text)
     
-    def _call_claude(self, prompt: str, doc_name: str) -> Tuple[Dict[str, str], Dict[str, float]]:
+    async def _call_ai_async(self, prompt: str, doc_name: str, max_tokens: int = 1000) -> str:
+        """Async counterpart of _call_ai_for_document(raw=True); "" on failure"""
+        # The SDK calls are blocking; a worker thread keeps them off the event loop
+        return await asyncio.to_thread(
+            self._call_ai_for_document, prompt, doc_name, max_tokens, True)
+    
+    def _call_claude(self, prompt: str, doc_name: str, max_tokens: int = 1000) -> str:
         """Call Claude API for document processing"""
-        try:
+        if HAS_LLM_CLIENT:
             # Try llm_client first
-            import llm_client
             os.environ["ANTHROPIC_API_KEY"] = self.api_key.strip()
-            response_text = llm_client.generate_with_claude(self.model, prompt)
+            response_text = llm_client.generate_with_claude(self.model, prompt, max_tokens=max_tokens)
             
-        except ImportError:
+        else:
             # Fallback to direct API
-            client = anthropic.Anthropic(api_key=self.api_key)
-            response = client.messages.create(
+            if self._claude_client is None:
+                self._claude_client = anthropic.Anthropic(
+                    api_key=self.api_key, max_retries=_API_MAX_RETRIES, timeout=_API_TIMEOUT)
+            response = self._claude_client.messages.create(
                 model=self.model,
-                max_tokens=1000,
+                max_tokens=max_tokens,
                 messages=[{"role": "user", "content": prompt}]
             )
             response_text = response.content[0].text
         
-        return self._parse_ai_response(response_text)
+        return response_text
     
-    def _call_openai(self, prompt: str, doc_name: str) -> Tuple[Dict[str, str], Dict[str, float]]:
+    def _call_openai(self, prompt: str, doc_name: str, max_tokens: int = 1000) -> str:
         """Call OpenAI API for document processing"""
-        try:
+        if HAS_LLM_CLIENT:
             # Try llm_client first
-            import llm_client  
             os.environ["OPENAI_API_KEY"] = self.api_key.strip()
-            response_text = llm_client.generate_with_openai(self.model, prompt)
+            response_text = llm_client.generate_with_openai(self.model, prompt, max_tokens=max_tokens)
             
-        except ImportError:
+        else:
             # Fallback to direct API
-            client = openai.OpenAI(api_key=self.api_key)
-            response = client.chat.completions.create(
+            if self._openai_client is None:
+                self._openai_client = openai.OpenAI(
+                    api_key=self.api_key, max_retries=_API_MAX_RETRIES, timeout=_API_TIMEOUT)
+            response = self._openai_client.chat.completions.create(
                 model=self.model,
                 messages=[{"role": "user", "content": prompt}],
-                max_tokens=1000
+                max_tokens=max_tokens
             )
             response_text = response.choices[0].message.content
         
-        return self._parse_ai_response(response_text)
+        return response_text
+    
+    def _load_response_json(self, response_text: str) -> Optional[Dict[str, Any]]:
+        """Return the JSON object embedded in an AI response, or None"""
+        # Parse forward from each '{' until one decodes to an object; raw_decode
+        # stops at the end of that object, so trailing prose or a second JSON
+        # block never has to be located or sliced off
+        start = response_text.find('{')
+        while start >= 0:
+            try:
+                result, _end = _RESPONSE_DECODER.raw_decode(response_text, start)
+            except json.JSONDecodeError:
+                start = response_text.find('{', start + 1)
+                continue
+            if isinstance(result, dict):
+                return result
+            start = response_text.find('{', start + 1)
+        return None
+    
+    def _split_result(self, result: Dict[str, Any]) -> Tuple[Dict[str, str], Dict[str, float]]:
+        """Pull extracted data and confidence scores out of one result object"""
+        extracted_data = result.get("extracted_data", {})
+        confidence_scores = result.get("confidence_scores", {})
+        
+        # Generate default confidence if missing
+        if extracted_data and not confidence_scores:
+            confidence_scores = {k: 0.8 for k in extracted_data.keys()}
+        
+        return extracted_data, confidence_scores
     
     def _parse_ai_response(self, response_text: str) -> Tuple[Dict[str, str], Dict[str, float]]:
         """Parse AI response to extract data and confidence scores"""
-        try:
-            # Find JSON in response
-            start = response_text.find('{')
-            end = response_text.rfind('}') + 1
-            
-            if start >= 0 and end > start:
-                json_text = response_text[start:end]
-                result = json.loads(json_text)
-                
-                extracted_data = result.get("extracted_data", {})
-                confidence_scores = result.get("confidence_scores", {})
-                
-                # Generate default confidence if missing
-                if extracted_data and not confidence_scores:
-                    confidence_scores = {k: 0.8 for k in extracted_data.keys()}
-                
-                return extracted_data, confidence_scores
-            else:
-                return {}, {}
-                
-        except json.JSONDecodeError:
+        result = self._load_response_json(response_text)
+        if result is None:
             return {}, {}
+        return self._split_result(result)
+    
+    def _parse_batched_response(self, response_text: str, document_count: int,
+                                form_fields: List[FormField]) -> Dict[int, Tuple[Dict[str, str], Dict[str, float]]]:
+        """Parse a batched AI response into doc_id -> (data, confidence scores)"""
+        result = self._load_response_json(response_text)
+        if result is None:
+            return {}
+        
+        per_doc = {}
+        for entry in result.get("results", []):
+            if not isinstance(entry, dict):
+                continue
+            try:
+                doc_id = int(entry.get("doc_id"))
+            except (TypeError, ValueError):
+                continue
+            if 0 <= doc_id < document_count:
+                per_doc[doc_id] = self._split_indexed_result(entry.get("fields"), form_fields)
+        return per_doc
+    
+    def _split_indexed_result(self, fields: Any,
+                              form_fields: List[FormField]) -> Tuple[Dict[str, str], Dict[str, float]]:
+        """Map a batched '"INDEX": [value, confidence]' object back to field names"""
+        extracted_data = {}
+        confidence_scores = {}
+        if not isinstance(fields, dict):
+            return extracted_data, confidence_scores
+        for index, answer in fields.items():
+            try:
+                position = int(index)
+            except (TypeError, ValueError):
+                continue
+            if not 0 <= position < len(form_fields):
+                continue
+            name = form_fields[position].name
+            if isinstance(answer, list) and answer:
+                value = answer[0]
+                confidence = answer[1] if len(answer) > 1 else 0.8
+            else:
+                value, confidence = answer, 0.8
+            if not isinstance(value, str) or not isinstance(confidence, (int, float)):
+                continue
+            extracted_data[name] = value
+            confidence_scores[name] = float(confidence)
+        return extracted_data, confidence_scores
     
     def _merge_extraction_results(self, results: List[ExtractionResult], 
                                 form_fields: List[FormField]) -> MergedResult:
         """Intelligently merge results from multiple documents"""
-        print(f"\n🔗 MERGING RESULTS FROM {len(results)} DOCUMENTS")
-        print("=" * 50)
-        
-        merged_data = {}
-        confidence_scores = {}
-        source_mapping = {}
-        
-        # Get all unique fields across all results
-        all_fields = set()
+        # Checked once; nothing below formats per-field output when it is off
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.debug("Merging results from %d documents", len(results))
+        
+        # One pass over the results, keeping a running best per field:
+        # field -> [features, confidence, value, source, candidate count].
+        # Results are visited in order, so every field sees its candidates in
+        # the same order as a per-field scan would.
+        best = {}
+        is_better = self._is_better_value
         for result in results:
-            all_fields.update(result.extracted_data.keys())
+            value_features = result.value_features
+            result_confidence = result.confidence_scores
+            document_name = result.document_name
+            for field, value in result.extracted_data.items():
+                entry = best.get(field)
+                if entry is None:
+                    entry = best[field] = [None, 0.0, "", "", 0]
+                entry[4] += 1
+                confidence = result_confidence.get(field, 0.0)
+                
+                # A held value more than 0.1 more confident always wins in
+                # _is_better_value, so such candidates are skipped without a call
+                if entry[1] > confidence + 0.1 and entry[0] and entry[0][2]:
+                    continue
+                features = value_features[field]
+                
+                # Choose best based on confidence and value quality
+                if is_better(features, confidence, entry[0], entry[1]):
+                    entry[0:4] = features, confidence, value, document_name
         
-        print(f"📊 Total unique fields found: {len(all_fields)}")
+        if debug:
+            contested = sum(1 for entry in best.values() if entry[4] > 1)
+            logger.debug("%d unique fields found, %d in more than one document",
+                         len(best), contested)
         
-        # For each field, pick the best data from all sources
-        for field in all_fields:
-            best_value = ""
-            best_confidence = 0.0
-            best_source = ""
-            
-            print(f"\n🔍 Merging field: {field}")
-            
-            # Check each document result
-            for result in results:
-                if field in result.extracted_data:
-                    value = result.extracted_data[field]
-                    confidence = result.confidence_scores.get(field, 0.0)
-                    
-                    print(f"   📄 {result.document_name}: '{value}' (confidence: {confidence:.2f})")
-                    
-                    # Choose best based on confidence and value quality
-                    if self._is_better_value(value, confidence, best_value, best_confidence):
-                        best_value = value
-                        best_confidence = confidence
-                        best_source = result.document_name
-                        print(f"   ✅ New best value from {best_source}")
-            
-            if best_value:
-                merged_data[field] = best_value
-                confidence_scores[field] = best_confidence
-                source_mapping[field] = best_source
-                print(f"   🎯 Final: '{best_value}' from {best_source}")
+        chosen = {field: entry for field, entry in best.items() if entry[2]}
+        merged_data = {field: entry[2] for field, entry in chosen.items()}
+        confidence_scores = {field: entry[1] for field, entry in chosen.items()}
+        source_mapping = {field: entry[3] for field, entry in chosen.items()}
         
         # Create processing summary
         processing_summary = {
@@ -466,27 +935,31 @@ Extract relevant data from this {doc_type} document now."""
             processing_summary=processing_summary
         )
         
-        print(f"\n🎉 MERGE COMPLETED")
-        print(f"📊 Final merged result: {len(merged_data)} fields")
-        print(f"📄 Source distribution:")
-        source_counts = {}
-        for source in source_mapping.values():
-            source_counts[source] = source_counts.get(source, 0) + 1
-        for source, count in source_counts.items():
-            print(f"   {source}: {count} fields")
+        if logger.isEnabledFor(logging.INFO):
+            source_counts = {}
+            for source in source_mapping.values():
+                source_counts[source] = source_counts.get(source, 0) + 1
+            logger.info("Merge completed: %d fields, source distribution %s",
+                        len(merged_data), source_counts)
         
         return result
     
-    def _is_better_value(self, new_value: str, new_confidence: float,
-                        current_value: str, current_confidence: float) -> bool:
-        """Determine if new value is better than current best"""
+    def _is_better_value(self, new_features: Tuple[bool, bool, int], new_confidence: float,
+                        current_features: Optional[Tuple[bool, bool, int]],
+                        current_confidence: float) -> bool:
+        """Determine if new value is better than current best
+        
+        Values are compared through their _value_features tuples
+        (has_money, has_contact, length); None means no current value.
+        """
+        new_money, new_contact, new_length = new_features
         
         # If no current value, new is better
-        if not current_value:
-            return bool(new_value)
+        if not current_features or not current_features[2]:
+            return new_length > 0
         
         # If new value is empty, current is better
-        if not new_value:
+        if not new_length:
             return False
         
         # Strongly prefer higher confidence
@@ -496,15 +969,15 @@ Extract relevant data from this {doc_type} document now."""
             return False
         
         # Similar confidence - prefer longer, more detailed values
-        if len(new_value) > len(current_value) * 1.5:
+        if new_length > current_features[2] * 1.5:
             return True
         
         # Prefer values with monetary amounts for financial fields
-        if '$' in new_value and '$' not in current_value:
+        if new_money and not current_features[0]:
             return True
         
         # Prefer contact info (email, phone) for contact fields
-        if '@' in new_value or '(' in new_value:
+        if new_contact:
             return True
         
         # Default to current value
@@ -724,12 +1197,15 @@ class PDFFormFillerV4(QMainWindow):
     def extract_form_fields(self):
         """Extract fillable fields from PDF form"""
         try:
-            result = subprocess.run(
+            # Parse the dump while pdftk is still writing it, line by line
+            with subprocess.Popen(
                 ["pdftk", self.form_file_path, "dump_data_fields"],
-                capture_output=True, text=True, check=True
-            )
+                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+            ) as proc:
+                fields = self.parse_pdftk_fields_iter(proc.stdout)
+            if proc.returncode:
+                raise subprocess.CalledProcessError(proc.returncode, proc.args)
             
-            fields = self.parse_pdftk_fields(result.stdout)
             self.form_fields = fields
             self.fields_label.setText(f"Fields: {len(fields)}")
             
@@ -741,61 +1217,37 @@ class PDFFormFillerV4(QMainWindow):
     
     def parse_pdftk_fields(self, pdftk_output: str) -> List[FormField]:
         """Parse pdftk field dump output"""
+        return self.parse_pdftk_fields_iter(pdftk_output.splitlines())
+    
+    def parse_pdftk_fields_iter(self, lines) -> List[FormField]:
+        """Parse pdftk field dump output from any iterable of lines"""
         fields = []
         current_field = {}
         
-        for line in pdftk_output.strip().split('\n'):
-            if line.startswith('FieldName:'):
+        for line in lines:
+            match = _PDFTK_LINE_RE.match(line)
+            if not match:
+                continue
+            separator, key, value = match.groups()
+            
+            if separator:
+                # Record separator; pdftk writes FieldType before FieldName
                 if current_field:
-                    if FIELD_MAPPING_AVAILABLE:
-                        field = FormField(
-                            name=current_field.get('name', ''),
-                            field_type=current_field.get('type', 'text'),
-                            alt_text=current_field.get('alt_text', ''),
-                            value=current_field.get('value', ''),
-                            options=current_field.get('options', [])
-                        )
-                    else:
-                        # Simple dict-based field for compatibility
-                        field = {
-                            'name': current_field.get('name', ''),
-                            'type': current_field.get('type', 'text'),
-                            'alt_text': current_field.get('alt_text', ''),
-                            'value': current_field.get('value', ''),
-                            'options': current_field.get('options', [])
-                        }
-                    fields.append(field)
-                
-                current_field = {'name': line.split(':', 1)[1].strip()}
-                
-            elif line.startswith('FieldType:'):
-                current_field['type'] = line.split(':', 1)[1].strip()
-            elif line.startswith('FieldValue:'):
-                current_field['value'] = line.split(':', 1)[1].strip()
-            elif line.startswith('FieldStateOption:'):
-                if 'options' not in current_field:
-                    current_field['options'] = []
-                current_field['options'].append(line.split(':', 1)[1].strip())
+                    fields.append(_make_field(current_field))
+                current_field = {}
+            elif key == 'FieldName':
+                if 'name' in current_field:
+                    fields.append(_make_field(current_field))
+                    current_field = {}
+                current_field['name'] = value
+            elif key == 'FieldStateOption':
+                current_field.setdefault('options', []).append(value)
+            else:
+                current_field[_PDFTK_ATTRIBUTES[key]] = value
         
         # Add the last field
         if current_field:
-            if FIELD_MAPPING_AVAILABLE:
-                field = FormField(
-                    name=current_field.get('name', ''),
-                    field_type=current_field.get('type', 'text'),
-                    alt_text=current_field.get('alt_text', ''),
-                    value=current_field.get('value', ''),
-                    options=current_field.get('options', [])
-                )
-            else:
-                field = {
-                    'name': current_field.get('name', ''),
-                    'type': current_field.get('type', 'text'),
-                    'alt_text': current_field.get('alt_text', ''),
-                    'value': current_field.get('value', ''),
-                    'options': current_field.get('options', [])
-                }
-            fields.append(field)
+            fields.append(_make_field(current_field))
         
         return fields
     
@@ -870,23 +1322,41 @@ class PDFFormFillerV4(QMainWindow):
         """Extract text from PDF using available libraries"""
         text_content = []
         
-        # Try PyPDF2 first
-        if HAS_PYPDF2:
+        # Try PyMuPDF first; its C extractor is several times faster than the
+        # pure-Python parsers below
+        if HAS_PYMUPDF:
+            try:
+                with fitz.open(pdf_path) as doc:
+                    page_texts = [page.get_text("text") for page in doc]
+                text_content = [text for text in page_texts if text.strip()]
+                
+                if text_content:
+                    extracted_text = "\n\n".join(text_content)
+                    print(f"✅ PyMuPDF extracted {len(extracted_text)} characters")
+                    return extracted_text
+                    
+            except Exception as e:
+                print(f"PyMuPDF extraction failed: {e}")
+                text_content = []
+        
+        # Then pypdf (or PyPDF2 where only the older package is installed)
+        if HAS_PYPDF:
             try:
                 with open(pdf_path, 'rb') as file:
-                    reader = PyPDF2.PdfReader(file)
+                    reader = PdfReader(file)
                     for page in reader.pages:
                         text = page.extract_text()
-                        if text.strip():
+                        if text and text.strip():
                             text_content.append(text)
                 
                 if text_content:
-                    extracted_text = "\\n\\n".join(text_content)
-                    print(f"✅ PyPDF2 extracted {len(extracted_text)} characters")
+                    extracted_text = "\n\n".join(text_content)
+                    print(f"✅ pypdf extracted {len(extracted_text)} characters")
                     return extracted_text
                     
             except Exception as e:
-                print(f"PyPDF2 extraction failed: {e}")
+                print(f"pypdf extraction failed: {e}")
+                text_content = []
         
         # Try pdfplumber as fallback
         if HAS_PDFPLUMBER:
@@ -898,7 +1368,7 @@ class PDFFormFillerV4(QMainWindow):
                             text_content.append(text)
                 
                 if text_content:
-                    extracted_text = "\\n\\n".join(text_content)
+                    extracted_text = "\n\n".join(text_content)
                     print(f"✅ pdfplumber extracted {len(extracted_text)} characters")
                     return extracted_text
                     
@@ -1047,26 +1517,27 @@ class PDFFormFillerV4(QMainWindow):
                 all_extracted = {}
                 all_confidence = {}
                 
+                # One processor (and so one API client) for every document
+                processor = MultiThreadedDocumentProcessor(
+                    api_key=self.api_key,
+                    model=self.model, 
+                    provider=self.provider
+                )
+                
+                form_fields = []
+                for field in self.form_fields:
+                    if FIELD_MAPPING_AVAILABLE and hasattr(field, 'name'):
+                        form_fields.append(field)
+                    else:
+                        form_fields.append(type('FormField', (), {
+                            'name': field.get('name') if isinstance(field, dict) else str(field),
+                            'field_type': field.get('type', 'text') if isinstance(field, dict) else 'text'
+                        })())
+                
                 for source in self.sources:
                     print(f"Processing {source.name} sequentially...")
                     
                     # Use first document approach but one at a time
-                    processor = MultiThreadedDocumentProcessor(
-                        api_key=self.api_key,
-                        model=self.model, 
-                        provider=self.provider
-                    )
-                    
-                    form_fields = []
-                    for field in self.form_fields:
-                        if FIELD_MAPPING_AVAILABLE and hasattr(field, 'name'):
-                            form_fields.append(field)
-                        else:
-                            form_fields.append(type('FormField', (), {
-                                'name': field.get('name') if isinstance(field, dict) else str(field),
-                                'field_type': field.get('type', 'text') if isinstance(field, dict) else 'text'
-                            })())
-                    
                     single_result = processor._process_single_document(source, form_fields)
                     
                     # Merge results
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the Claude request paths in llm_client.py
+"""
+
+import unittest
+import os
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+# llm_client lives at the repository root
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import llm_client
+
+FIXTURE_PDF = Path(__file__).parent.parent / "test_data" / "simple_form.pdf"
+
+
+def _fake_anthropic(upload_error=None):
+    """Build a stand-in anthropic module whose client records its calls"""
+    client = mock.MagicMock()
+    if upload_error:
+        client.beta.files.upload.side_effect = upload_error
+    else:
+        client.beta.files.upload.return_value = SimpleNamespace(id="file_123")
+    response = SimpleNamespace(content=[SimpleNamespace(text='{"ok": true}')],
+                               usage=SimpleNamespace(input_tokens=10))
+    client.messages.create.return_value = response
+    client.beta.messages.create.return_value = response
+    module = mock.MagicMock()
+    module.Anthropic.return_value = client
+    return module, client
+
+
+class TestMultiplePdfsClaude(unittest.TestCase):
+    """Test how the multi-PDF Claude request is sent"""
+
+    def setUp(self):
+        llm_client._claude_file_ids.clear()
+        llm_client._clients.clear()
+        env = mock.patch.dict(os.environ, {"ANTHROPIC_API_KEY": "key"})
+        env.start()
+        self.addCleanup(env.stop)
+
+    def _generate(self, module):
+        with mock.patch.dict(sys.modules, {"anthropic": module}):
+            return llm_client.generate_with_multiple_pdfs_claude(
+                "model", "prompt", [str(FIXTURE_PDF)])
+
+    def test_file_sources_use_beta_endpoint(self):
+        """Uploaded file_id blocks are sent with the Files API beta flag"""
+        module, client = _fake_anthropic()
+        self.assertEqual(self._generate(module), '{"ok": true}')
+        client.messages.create.assert_not_called()
+        kwargs = client.beta.messages.create.call_args.kwargs
+        self.assertEqual(kwargs["betas"], [llm_client._CLAUDE_FILES_BETA])
+        sources = [block["source"] for block in kwargs["messages"][0]["content"]
+                   if block["type"] == "document"]
+        self.assertEqual(sources, [{"type": "file", "file_id": "file_123"}])
+
+    def test_inline_sources_use_plain_endpoint(self):
+        """Without the Files API the base64 request goes to messages.create"""
+        module, client = _fake_anthropic(upload_error=RuntimeError("no files api"))
+        self.assertEqual(self._generate(module), '{"ok": true}')
+        client.beta.messages.create.assert_not_called()
+        self.assertNotIn("betas", client.messages.create.call_args.kwargs)
+
+    def test_client_is_reused(self):
+        """Repeat calls share one retrying SDK client and upload each PDF once"""
+        module, client = _fake_anthropic()
+        self._generate(module)
+        self._generate(module)
+        module.Anthropic.assert_called_once_with(api_key="key",
+                                                 max_retries=llm_client._API_MAX_RETRIES,
+                                                 timeout=llm_client._API_TIMEOUT)
+        client.beta.files.upload.assert_called_once()
+        self.assertEqual(client.beta.messages.create.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the PDF Form Filler v3 helpers (pdf_form_filler1.py)
+"""
+
+import unittest
+import importlib.util
+import json
+import os
+import random
+import sys
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+# pdf_form_filler1 lives at the repository root
+sys.path.insert(0, str(Path(__file__).parent.parent))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+HAS_PYQT6 = importlib.util.find_spec("PyQt6") is not None
+if HAS_PYQT6:
+    import pdf_form_filler1 as pff
+    HAS_PYMUPDF = pff.PYMUPDF_AVAILABLE
+    HAS_PIKEPDF = pff.PIKEPDF_AVAILABLE
+else:
+    HAS_PYMUPDF = HAS_PIKEPDF = False
+
+# Two text fields with tooltips and one checkbox
+FIXTURE_PDF = str(Path(__file__).parent.parent / "test_data" / "simple_form.pdf")
+EXPECTED_FIELDS = [
+    ("petitioner_name", "Text", "Petitioner name", []),
+    ("case_number", "Text", "Case number", []),
+    ("agree", "Button", "", ["Off", "Yes"]),
+]
+
+
+def _summarize(fields):
+    return [(f.name, f.type, f.alt_text, sorted(f.state_options)) for f in fields]
+
+
+@unittest.skipUnless(HAS_PYMUPDF, "PyQt6 or PyMuPDF not installed")
+class TestExtractWithPymupdf(unittest.TestCase):
+    """Test in-process field extraction with PyMuPDF"""
+
+    def test_reads_fixture_fields(self):
+        """All fields of the fixture come back as FormFields"""
+        extractor = pff.PDFFieldExtractor(FIXTURE_PDF)
+        fields = extractor._extract_with_pymupdf()
+        self.assertTrue(all(isinstance(f, pff.FormField) for f in fields))
+        self.assertEqual(_summarize(fields), EXPECTED_FIELDS)
+
+
+@unittest.skipUnless(HAS_PYQT6, "PyQt6 not installed")
+class TestCreateFdf(unittest.TestCase):
+    """Test FDF generation for the pdftk fill path"""
+
+    def test_escapes_string_delimiters(self):
+        """Parentheses and backslashes in values are escaped"""
+        fdf = pff.PDFFormFiller._create_fdf({"a": "x(y)"})
+        self.assertIsInstance(fdf, bytes)
+        self.assertTrue(fdf.startswith(b"%FDF-1.2\n"))
+        self.assertIn(b"<<\n/T (a)\n/V (x\\(y\\))\n>>\n", fdf)
+        self.assertTrue(fdf.endswith(b"%%EOF"))
+
+    def test_skips_empty_values(self):
+        """Fields without a value are left out"""
+        fdf = pff.PDFFormFiller._create_fdf({"a": "", "b": "c\\d"})
+        self.assertNotIn(b"/T (a)", fdf)
+        self.assertIn(b"/V (c\\\\d)", fdf)
+
+
+
+@unittest.skipUnless(HAS_PIKEPDF, "PyQt6 or pikepdf not installed")
+class TestPikepdf(unittest.TestCase):
+    """Test in-process field extraction and filling with pikepdf"""
+
+    def setUp(self):
+        fd, self.output_path = tempfile.mkstemp(suffix=".pdf")
+        os.close(fd)
+
+    def tearDown(self):
+        os.remove(self.output_path)
+
+    def _fill(self, field_data):
+        pff.PDFFormFiller._fill_with_pikepdf(FIXTURE_PDF, field_data, self.output_path)
+        pdf = pff.pikepdf.open(self.output_path)
+        self.addCleanup(pdf.close)
+        return {str(f.T): f for f in pdf.Root.AcroForm.Fields}
+
+    def test_reads_fixture_fields(self):
+        """pikepdf reports the same fields as PyMuPDF"""
+        fields = pff.PDFFieldExtractor(FIXTURE_PDF)._extract_with_pikepdf()
+        self.assertEqual(_summarize(fields), EXPECTED_FIELDS)
+
+    def test_fill_draws_text_appearance(self):
+        """Filled text fields get an appearance stream showing the value"""
+        fields = self._fill({"petitioner_name": "Jane (Doe)"})
+        self.assertEqual(str(fields["petitioner_name"].V), "Jane (Doe)")
+        appearance = fields["petitioner_name"].AP.N.read_bytes()
+        self.assertIn(b"(Jane \\(Doe\\)) Tj", appearance)
+
+    def test_fill_maps_checkbox_onto_its_on_state(self):
+        """Generic true/false values select the checkbox's own states"""
+        for value, expected in (("1", "/Yes"), ("Yes", "/Yes"), ("0", "/Off"), ("Off", "/Off")):
+            with self.subTest(value=value):
+                agree = self._fill({"agree": value})["agree"]
+                self.assertEqual(str(agree.V), expected)
+                self.assertEqual(str(agree.AS), expected)
+
+
+
+@unittest.skipUnless(HAS_PYQT6, "PyQt6 not installed")
+class TestJsonIOWorker(unittest.TestCase):
+    """Test mapping-file loading on the thread pool"""
+
+    DATA = {"a": 1.5, "b": 2, "c": {"x": [1, 2.25]}, "d": "text"}
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".json")
+        with os.fdopen(fd, "w") as f:
+            json.dump(self.DATA, f)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def _load(self):
+        loaded = []
+        worker = pff.JsonIOWorker(self.path, 'load')
+        worker.signals.loaded.connect(lambda path, data: loaded.append(data))
+        worker.signals.error.connect(self.fail)
+        worker.run()
+        return loaded[0]
+
+    def test_load(self):
+        """Small files are read in one go"""
+        self.assertEqual(self._load(), self.DATA)
+
+    @unittest.skipUnless(HAS_PYQT6 and pff.IJSON_AVAILABLE, "ijson not installed")
+    def test_streamed_load_keeps_number_types(self):
+        """Streaming with ijson gives the same values and types as json.load"""
+        with mock.patch.object(pff, "_STREAM_JSON_THRESHOLD", 0):
+            data = self._load()
+        self.assertEqual(data, self.DATA)
+        self.assertIs(type(data["a"]), float)
+        self.assertIs(type(data["c"]["x"][1]), float)
+
+
+
+@unittest.skipUnless(HAS_PYQT6, "PyQt6 not installed")
+class TestParsePdftkOutput(unittest.TestCase):
+    """Test parsing of raw pdftk dump_data_fields output"""
+
+    DUMP = (b"---\n"
+            b"FieldType: Text\n"
+            b"FieldName: petitioner_name\n"
+            b"FieldNameAlt: Petitioner \xc3\xa9\n"
+            b"FieldFlags: 4096\n"
+            b"FieldJustification: Center\n"
+            b"---\n"
+            b"FieldType: Button\n"
+            b"FieldName: agree\n"
+            b"FieldFlags: 0\n"
+            b"FieldStateOption: Off\n"
+            b"FieldStateOption: Yes\n")
+
+    def test_parses_fields(self):
+        """Every record becomes a FormField with decoded text attributes"""
+        fields = pff.PDFFieldExtractor(FIXTURE_PDF)._parse_pdftk_output(self.DUMP)
+        self.assertEqual(len(fields), 2)
+        text, button = fields
+        self.assertEqual((text.name, text.type, text.alt_text, text.flags, text.justification),
+                         ("petitioner_name", "Text", "Petitioner \u00e9", 4096, "Center"))
+        self.assertEqual((button.name, button.type, button.state_options),
+                         ("agree", "Button", ["Off", "Yes"]))
+        self.assertEqual(button.justification, "Left")
+
+    def test_empty_dump(self):
+        """No records gives no fields"""
+        self.assertEqual(pff.PDFFieldExtractor(FIXTURE_PDF)._parse_pdftk_output(b""), [])
+
+
+@unittest.skipUnless(HAS_PYQT6, "PyQt6 not installed")
+class TestFuzzyMatchIndex(unittest.TestCase):
+    """Test the trigram-prefiltered field name matching"""
+
+    NAMES = ["ab", "petitioner_name", "respondent_name", "case_number", "name", "x", "attorney_phone"]
+
+    def _match(self, key):
+        trigrams, short = pff._build_trigram_index(self.NAMES)
+        return pff._fuzzy_match_index(key, self.NAMES, trigrams, short)
+
+    @staticmethod
+    def _brute_force(key, names):
+        return next((i for i, name in enumerate(names) if key in name or name in key), None)
+
+    def test_examples(self):
+        """Substring matches in either direction, first field wins"""
+        self.assertEqual(self._match("case"), 3)
+        self.assertEqual(self._match("petitioner_name_full"), 1)
+        self.assertEqual(self._match("zzz"), None)
+        self.assertEqual(self._match("xab"), 0)
+
+    def test_matches_linear_scan(self):
+        """The prefilter never changes which field is picked"""
+        rng = random.Random(1234)
+        alphabet = "abcen_x"
+        names = ["".join(rng.choice(alphabet) for _ in range(rng.randint(0, 8))) for _ in range(40)]
+        trigrams, short = pff._build_trigram_index(names)
+        for _ in range(500):
+            key = "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 10)))
+            self.assertEqual(pff._fuzzy_match_index(key, names, trigrams, short),
+                             self._brute_force(key, names), key)
+
+
+@unittest.skipUnless(HAS_PYQT6, "PyQt6 not installed")
+class TestFindResponseObject(unittest.TestCase):
+    """Test locating the answer object in an AI response"""
+
+    def test_plain_object(self):
+        text = '{"extracted_data": {"a": "1"}}'
+        self.assertEqual(pff._find_response_object(text), {"extracted_data": {"a": "1"}})
+
+    def test_skips_prose_fences_and_other_objects(self):
+        """Objects without extracted_data and broken braces are passed over"""
+        text = ('Here you go {not json} and {"note": "x"}\n```json\n'
+                '{"extracted_data": {"a": "(1)"}, "confidence_scores": {"a": 0.9}}\n```\nDone {')
+        self.assertEqual(pff._find_response_object(text),
+                         {"extracted_data": {"a": "(1)"}, "confidence_scores": {"a": 0.9}})
+
+    def test_no_object(self):
+        self.assertIsNone(pff._find_response_object('no json {"other": 1}'))
+
+
+@unittest.skipUnless(HAS_PYQT6, "PyQt6 not installed")
+class TestLlmResponseCache(unittest.TestCase):
+    """Test which LLM responses are written to the on-disk cache"""
+
+    RESPONSE = '{"extracted_data": {"a": "1"}, "confidence_scores": {"a": 0.9}}'
+
+    def setUp(self):
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.cache_dir.cleanup)
+        patcher = mock.patch.object(pff, "_LLM_CACHE_DIR", Path(self.cache_dir.name))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.extractor = pff.AIDataExtractor(form_fields=[pff.FormField(name="a", type="Text")],
+                                             ai_provider="anthropic", api_key="key")
+        self.extractor.use_response_cache = True
+
+    def _extract(self, primary):
+        def generate(**kwargs):
+            pff.llm_client._call_state.primary = primary
+            return self.RESPONSE
+        with mock.patch.object(pff.llm_client, "generate_with_multiple_pdfs_claude",
+                               side_effect=generate) as call, \
+                mock.patch.dict(os.environ):
+            data, _scores = self.extractor._extract_with_anthropic_multi_doc([FIXTURE_PDF], "")
+        self.assertEqual(data, {"a": "1"})
+        return call
+
+    def test_primary_response_is_replayed(self):
+        self._extract(primary=True)
+        call = self._extract(primary=True)
+        call.assert_not_called()
+
+    def test_fallback_response_is_not_cached(self):
+        """A degraded fallback answer is used once but not written to disk"""
+        self._extract(primary=False)
+        self.assertEqual(os.listdir(self.cache_dir.name), [])
+        call = self._extract(primary=True)
+        call.assert_called_once()
+
+    @unittest.skipIf(os.environ.get("PDF_FORM_FILLER_LLM_CACHE") == "1", "cache enabled here")
+    def test_cache_is_opt_in(self):
+        """Without PDF_FORM_FILLER_LLM_CACHE=1 responses are neither read nor written"""
+        self.assertFalse(pff.AIDataExtractor().use_response_cache)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the multi-document processor in pdf_form_filler2.py
+"""
+
+import unittest
+import importlib.util
+import json
+import os
+import random
+import re
+import sys
+from pathlib import Path
+from unittest import mock
+
+# pdf_form_filler2 lives at the repository root
+sys.path.insert(0, str(Path(__file__).parent.parent))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+HAS_PYQT6 = importlib.util.find_spec("PyQt6") is not None
+if HAS_PYQT6:
+    import pdf_form_filler2 as pff2
+
+
+def _fields(count):
+    return [pff2.FormField(name=f"field_{i}", type="Text") for i in range(count)]
+
+
+_LABELS = ["Name of petitioner", "Case number", "Monthly gross income",
+           "Date of separation", "Employer name and address", "Total debts"]
+_VALUES = ["Jane Q. Respondent-Smith", "24FL001234", "$12,345.67", "03/15/2023",
+           "1234 Main Street, Apt 5B, Los Angeles, CA 90012", "$8,900.00"]
+
+
+def _xfa_fields(count):
+    """Fields named and labelled like a Judicial Council XFA form"""
+    return [pff2.FormField(name=f"FL-142[0].Page{i // 10 + 1}[0].List{i % 10}[0]"
+                                f".Li{i}[0].TextField{i % 3}[0]",
+                           type="Text", alt_text=_LABELS[i % len(_LABELS)])
+            for i in range(count)]
+
+
+def _full_answer_tokens(form_fields):
+    """Pessimistic token count of an answer that fills every field
+
+    Every word, punctuation mark and line indent counts as its own token.
+    """
+    answer = {
+        "extracted_data": {f.name: f"{_VALUES[i % len(_VALUES)]} [Field: {f.alt_text}]"
+                           for i, f in enumerate(form_fields)},
+        "confidence_scores": {f.name: 0.95 for f in form_fields},
+    }
+    return _pessimistic_tokens(answer)
+
+
+def _full_batched_answer_tokens(form_fields, document_count):
+    """Pessimistic token count of a batched answer that fills every field of every document"""
+    answer = {"results": [
+        {"doc_id": doc_id,
+         "fields": {str(i): [_VALUES[i % len(_VALUES)], 0.95] for i in range(len(form_fields))}}
+        for doc_id in range(document_count)
+    ]}
+    return _pessimistic_tokens(answer)
+
+
+def _pessimistic_tokens(answer):
+    return len(re.findall(r"\w+|[^\w\s]|\n\s*", json.dumps(answer, indent=4)))
+
+
+@unittest.skipUnless(HAS_PYQT6, "PyQt6 not installed")
+class TestBatchDocuments(unittest.TestCase):
+    """Test how documents are grouped into AI calls"""
+
+    def setUp(self):
+        self.processor = pff2.MultiThreadedDocumentProcessor("key", "model")
+
+    def _documents(self, count, size=100):
+        return [pff2.DocumentSource(name=f"doc_{i}", content="x" * size) for i in range(count)]
+
+    def test_small_documents_share_one_call(self):
+        """Short documents for a small form go out together"""
+        batches = self.processor._batch_documents(self._documents(3), _fields(5))
+        self.assertEqual([len(b) for b in batches], [3])
+
+    def test_batches_fit_the_output_budget(self):
+        """No batch asks for more answer tokens than the model can return"""
+        form_fields = _fields(40)
+        documents = self._documents(12)
+        batches = self.processor._batch_documents(documents, form_fields)
+        budget = self.processor._batch_budget_tokens(form_fields)
+        self.assertGreater(len(batches), 1)
+        for batch in batches:
+            self.assertLessEqual(budget * len(batch), pff2._output_limit("model"))
+        self.assertEqual([d for b in batches for d in b], documents)
+
+    def test_large_forms_get_one_document_per_call(self):
+        """A form whose answer alone fills the budget is never batched"""
+        batches = self.processor._batch_documents(self._documents(3), _fields(500))
+        self.assertEqual([len(b) for b in batches], [1, 1, 1])
+
+    def test_fl142_sized_form_is_batched(self):
+        """A form with FL-142's field count still shares calls, and the answers fit"""
+        for model, count in (("claude-3-5-sonnet-20240620", 150), ("gpt-4o", 250)):
+            with self.subTest(model=model, count=count):
+                processor = pff2.MultiThreadedDocumentProcessor("key", model)
+                form_fields = _xfa_fields(count)
+                batches = processor._batch_documents(self._documents(4), form_fields)
+                self.assertEqual([len(b) for b in batches], [2, 2])
+                max_tokens = min(pff2._output_limit(model),
+                                 processor._batch_budget_tokens(form_fields) * 2)
+                self.assertLessEqual(_full_batched_answer_tokens(form_fields, 2), max_tokens)
+
+    def test_content_budget_splits_batches(self):
+        """Text beyond _BATCH_CONTENT_BUDGET starts a new batch"""
+        per_doc = pff2._RELEVANT_TEXT_BUDGET
+        count = pff2._BATCH_CONTENT_BUDGET // per_doc + 1
+        batches = self.processor._batch_documents(self._documents(count, per_doc), [])
+        self.assertEqual(sum(len(b) for b in batches), count)
+        for batch in batches:
+            self.assertLessEqual(per_doc * len(batch), pff2._BATCH_CONTENT_BUDGET)
+
+
+@unittest.skipUnless(HAS_PYQT6, "PyQt6 not installed")
+class TestResponseBudget(unittest.TestCase):
+    """Test the max_tokens sizing for AI calls"""
+
+    def setUp(self):
+        self.processor = pff2.MultiThreadedDocumentProcessor("key", "model")
+
+    def test_budget_grows_with_field_count(self):
+        """Each field adds its share on top of the base budget"""
+        self.assertEqual(self.processor._budget_tokens([]), pff2._RESPONSE_BASE_TOKENS)
+        self.assertLess(self.processor._budget_tokens(_fields(10)),
+                        self.processor._budget_tokens(_fields(20)))
+
+    def test_budget_grows_with_name_length(self):
+        """Long field names and labels get a larger share"""
+        short = [pff2.FormField(name="name", type="Text")]
+        long = [pff2.FormField(name="FL-142[0].Page1[0].P1Caption[0].TitlePartyName[0].Party1[0]",
+                               type="Text", alt_text="Name of petitioner")]
+        self.assertGreater(self.processor._budget_tokens(long), self.processor._budget_tokens(short))
+
+    def test_realistic_answer_fits(self):
+        """A full answer for XFA-named fields stays inside the budget"""
+        for count in (1, 10, 40):
+            with self.subTest(count=count):
+                form_fields = _xfa_fields(count)
+                self.assertLessEqual(_full_answer_tokens(form_fields),
+                                     self.processor._budget_tokens(form_fields))
+
+    def test_budget_is_capped(self):
+        """Very large forms stop at the model's output limit"""
+        self.assertEqual(self.processor._budget_tokens(_fields(1000)), pff2._DEFAULT_OUTPUT_LIMIT)
+        processor = pff2.MultiThreadedDocumentProcessor("key", "gpt-4o-mini")
+        self.assertEqual(processor._budget_tokens(_fields(1000)), 16384)
+
+    def test_output_limit_prefers_longest_prefix(self):
+        self.assertEqual(pff2._output_limit("gpt-4o-2024-08-06"), 16384)
+        self.assertEqual(pff2._output_limit("gpt-4-turbo-preview"), 4096)
+        self.assertEqual(pff2._output_limit("claude-3-5-sonnet-20240620"), 8192)
+        self.assertEqual(pff2._output_limit("no-such-model"), pff2._DEFAULT_OUTPUT_LIMIT)
+
+    @unittest.skipUnless(HAS_PYQT6 and pff2.HAS_LLM_CLIENT, "llm_client not importable")
+    def test_budget_reaches_llm_client(self):
+        """The llm_client path sends the requested max_tokens"""
+        for provider, function in (("claude", "generate_with_claude"), ("openai", "generate_with_openai")):
+            with self.subTest(provider=provider), \
+                    mock.patch.object(pff2.llm_client, function, return_value="{}") as generate, \
+                    mock.patch.dict(os.environ):
+                processor = pff2.MultiThreadedDocumentProcessor("key", "model", provider)
+                processor._call_ai_for_document("prompt", "doc", max_tokens=321)
+                self.assertEqual(generate.call_args.kwargs["max_tokens"], 321)
+
+
+@unittest.skipUnless(HAS_PYQT6, "PyQt6 not installed")
+class TestResponseParsing(unittest.TestCase):
+    """Test reading JSON answers out of AI responses"""
+
+    def setUp(self):
+        self.processor = pff2.MultiThreadedDocumentProcessor("key", "model")
+
+    def test_load_skips_prose_and_broken_braces(self):
+        text = 'Sure {oops} here:\n```json\n{"extracted_data": {"a": "1"}}\n```\n{"extra": 2}'
+        self.assertEqual(self.processor._load_response_json(text), {"extracted_data": {"a": "1"}})
+
+    def test_load_without_object(self):
+        self.assertIsNone(self.processor._load_response_json("nothing [1, 2] here"))
+
+    def test_missing_confidence_defaults(self):
+        """Fields without scores get the default confidence"""
+        data, scores = self.processor._parse_ai_response('{"extracted_data": {"a": "x", "b": "y"}}')
+        self.assertEqual(data, {"a": "x", "b": "y"})
+        self.assertEqual(scores, {"a": 0.8, "b": 0.8})
+
+    def test_batched_response(self):
+        """Entries are keyed by doc_id; bad or out-of-range ids are dropped"""
+        text = ('{"results": ['
+                '{"doc_id": 0, "fields": {"0": ["x", 0.5]}},'
+                '{"doc_id": "1", "fields": {"1": "y"}},'
+                '{"doc_id": 5, "fields": {"2": ["z", 0.9]}},'
+                '{"doc_id": null}, "junk"]}')
+        per_doc = self.processor._parse_batched_response(text, 2, _fields(3))
+        self.assertEqual(per_doc, {0: ({"field_0": "x"}, {"field_0": 0.5}),
+                                   1: ({"field_1": "y"}, {"field_1": 0.8})})
+
+    def test_batched_field_numbers(self):
+        """Field numbers map back to names; unknown numbers and bad answers are dropped"""
+        text = ('{"results": [{"doc_id": 0, "fields": {'
+                '"1": ["a", 0.7], "-1": ["b", 0.9], "3": ["c", 0.9], "x": ["d", 0.9],'
+                '"0": [null, 0.9], "2": ["e"]}}]}')
+        per_doc = self.processor._parse_batched_response(text, 1, _fields(3))
+        self.assertEqual(per_doc, {0: ({"field_1": "a", "field_2": "e"},
+                                       {"field_1": 0.7, "field_2": 0.8})})
+
+
+@unittest.skipUnless(HAS_PYQT6, "PyQt6 not installed")
+class TestMergeExtractionResults(unittest.TestCase):
+    """Test merging per-document results into one answer per field"""
+
+    def setUp(self):
+        self.processor = pff2.MultiThreadedDocumentProcessor("key", "model")
+
+    def _merge(self, *results):
+        return self.processor._merge_extraction_results(
+            [pff2.ExtractionResult(name, data, scores, 0.1) for name, data, scores in results], [])
+
+    def test_higher_confidence_wins(self):
+        merged = self._merge(("a.pdf", {"f": "low"}, {"f": 0.5}),
+                             ("b.pdf", {"f": "high"}, {"f": 0.9}))
+        self.assertEqual(merged.merged_data, {"f": "high"})
+        self.assertEqual(merged.confidence_scores, {"f": 0.9})
+        self.assertEqual(merged.source_mapping, {"f": "b.pdf"})
+
+    def test_similar_confidence_prefers_detail(self):
+        """Longer values and money amounts win when confidence is close"""
+        merged = self._merge(("a.pdf", {"f": "Jo", "g": "rent"}, {"f": 0.8, "g": 0.8}),
+                             ("b.pdf", {"f": "Joanna Smith", "g": "$1,200"}, {"f": 0.75, "g": 0.8}))
+        self.assertEqual(merged.merged_data, {"f": "Joanna Smith", "g": "$1,200"})
+
+    def test_empty_values_are_dropped(self):
+        merged = self._merge(("a.pdf", {"f": "", "g": "x"}, {"f": 1.0, "g": 0.5}))
+        self.assertEqual(merged.merged_data, {"g": "x"})
+        self.assertEqual(merged.total_fields, 1)
+        self.assertEqual(merged.processing_summary["documents_processed"], 1)
+
+    def test_matches_per_field_scan(self):
+        """The single-pass merge picks what a field-by-field _is_better_value scan picks"""
+        rng = random.Random(42)
+        values = ["", "a", "ab", "abcdef", "$5", "x@y.z", "(555) 123", "long value text"]
+        for _ in range(200):
+            results = []
+            for d in range(rng.randint(1, 5)):
+                fields = rng.sample(["f1", "f2", "f3"], rng.randint(0, 3))
+                results.append(pff2.ExtractionResult(
+                    f"doc{d}", {f: rng.choice(values) for f in fields},
+                    {f: rng.choice([0.0, 0.3, 0.5, 0.55, 0.7, 0.9, 1.0]) for f in fields}, 0.1))
+            merged = self.processor._merge_extraction_results(results, [])
+            expected = {}
+            for field in ("f1", "f2", "f3"):
+                best_value, best_conf = "", 0.0
+                for r in results:
+                    if field not in r.extracted_data:
+                        continue
+                    value = r.extracted_data[field]
+                    conf = r.confidence_scores.get(field, 0.0)
+                    current = pff2._value_features(best_value) if best_value else None
+                    if self.processor._is_better_value(pff2._value_features(value), conf,
+                                                       current, best_conf):
+                        best_value, best_conf = value, conf
+                if best_value:
+                    expected[field] = best_value
+            self.assertEqual(merged.merged_data, expected)
+
+
+@unittest.skipUnless(HAS_PYQT6, "PyQt6 not installed")
+class TestExtractRelevantSpans(unittest.TestCase):
+    """Test trimming long documents to the text around field keywords"""
+
+    def setUp(self):
+        self.processor = pff2.MultiThreadedDocumentProcessor("key", "model")
+
+    def test_short_document_unchanged(self):
+        content = "Petitioner: Jane Doe"
+        self.assertEqual(self.processor._extract_relevant_spans(content, _fields(3), "general_legal"),
+                         content)
+
+    def test_keeps_context_around_keywords(self):
+        """Passages near field keywords survive and the budget holds"""
+        filler = "lorem ipsum " * 2000
+        content = filler + "Petitioner address: 12 Main Street" + filler
+        form_fields = [pff2.FormField(name="PetitionerAddress", type="Text")]
+        spans = self.processor._extract_relevant_spans(content, form_fields, "general_legal")
+        self.assertIn("Petitioner address: 12 Main Street", spans)
+        self.assertLessEqual(len(spans.replace("\n...\n", "")), pff2._RELEVANT_TEXT_BUDGET)
+
+    def test_no_keywords_keeps_the_start(self):
+        content = "zzzz " * 5000
+        spans = self.processor._extract_relevant_spans(content, [], "no_such_type")
+        self.assertEqual(spans, content[:pff2._RELEVANT_TEXT_BUDGET])
+
+
+if __name__ == '__main__':
+    unittest.main()